@@ -1,3 +1,3 @@
-def classFactory(iface):
-    from .minimum_bounding_box import MinimumBoundingBox
+def classFactory(iface):
+    from .minimum_bounding_box import MinimumBoundingBox
     return MinimumBoundingBox(iface) 
\ No newline at end of file
@@ -0,0 +1,192 @@
+"""
+Streaming group aggregation.
+
+Keeps a small running state per group instead of every feature of the
+group: four floats for envelopes, and a convex hull for the other
+geometry types or when measuring. Vertices of incoming features are
+buffered and folded into the running hulls in batches, so peak memory
+grows with the number of groups rather than the number of features.
+
+With a ``transform`` (see reproject.BulkTransform) the running hulls are
+kept in the target CRS: buffered vertices are transformed in one call per
+batch. Envelopes are kept in the source CRS and transformed, densified,
+when the results are built.
+"""
+import numpy as np
+
+from . import geometry_engine
+
+# Buffered vertices, across all groups, before folding them into the hulls
+FLUSH_VERTICES = 200000
+
+# Rough bytes per group for the dict entries, key and attribute values
+GROUP_OVERHEAD = 512
+
+
+class GroupAggregator:
+    def __init__(self, geometry_type, flush_vertices=FLUSH_VERTICES, measure=False,
+                 tolerance=None, transform=None):
+        self.geometry_type = geometry_type
+        self.flush_vertices = flush_vertices
+        self.measure = measure
+        # Vertex pre-filter before each hull batch, see reduce_vertices
+        self.tolerance = tolerance
+        self.transform = transform
+        # Measurements need the hull even when the output is an envelope
+        self.keep_hulls = geometry_type != geometry_engine.ENVELOPE or measure
+        self.values = {}
+        self.bounds = {}
+        self.hulls = {}
+        self.pending = {}
+        # Hulls of partial results, already in the target CRS
+        self.partials = {}
+        self.pending_vertices = 0
+        self.hull_vertices = 0
+
+    def __contains__(self, key):
+        return key in self.values
+
+    def __len__(self):
+        return len(self.values)
+
+    def add_group(self, key, values):
+        """Register a group with the attribute values of its first feature"""
+        self.values[key] = values
+
+    def add_bounds(self, key, min_x, min_y, max_x, max_y):
+        """Merge a feature extent into the group envelope"""
+        bounds = self.bounds.get(key)
+        if bounds is None:
+            self.bounds[key] = [min_x, min_y, max_x, max_y]
+            return
+        if min_x < bounds[0]:
+            bounds[0] = min_x
+        if min_y < bounds[1]:
+            bounds[1] = min_y
+        if max_x > bounds[2]:
+            bounds[2] = max_x
+        if max_y > bounds[3]:
+            bounds[3] = max_y
+
+    def add_coordinates(self, key, coords):
+        """Queue feature vertices to be merged into the group hull"""
+        if not self.keep_hulls:
+            if len(coords):
+                self.add_bounds(key, *coords.min(axis=0), *coords.max(axis=0))
+            return
+        if not len(coords):
+            return
+        self.pending.setdefault(key, []).append(coords)
+        self.pending_vertices += len(coords)
+        if self.pending_vertices >= self.flush_vertices:
+            self.flush()
+
+    def flush(self):
+        """Fold all buffered vertices into the running hulls in one batch"""
+        if not self.pending and not self.partials:
+            return
+        keys = list(self.pending)
+        keys.extend(key for key in self.partials if key not in self.pending)
+        arrays = [self.pending.pop(key, []) for key in keys]
+        if self.transform is not None and any(arrays):
+            coords, offsets = geometry_engine.pack_coordinates(
+                [np.concatenate(parts) if parts else np.empty((0, 2)) for parts in arrays]
+            )
+            coords = self.transform.coords(coords)
+            arrays = [
+                [coords[offsets[i]:offsets[i + 1]]] if offsets[i + 1] > offsets[i] else []
+                for i in range(len(keys))
+            ]
+        for i, key in enumerate(keys):
+            parts = arrays[i] + self.partials.pop(key, [])
+            hull = self.hulls.get(key)
+            if hull is not None:
+                parts.append(hull)
+            arrays[i] = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        coords, offsets = geometry_engine.pack_coordinates(arrays)
+        if self.tolerance is not None:
+            coords, offsets = geometry_engine.reduce_vertices(coords, offsets, self.tolerance)
+        hull_coords, hull_offsets = geometry_engine.convex_hulls(coords, offsets)
+        for i, key in enumerate(keys):
+            previous = self.hulls.get(key)
+            if previous is not None:
+                self.hull_vertices -= len(previous)
+            self.hulls[key] = hull_coords[hull_offsets[i]:hull_offsets[i + 1]].copy()
+            self.hull_vertices += len(self.hulls[key])
+        self.pending_vertices = 0
+
+    def memory_estimate(self):
+        """Approximate bytes held by the running state"""
+        vertices = self.pending_vertices + self.hull_vertices
+        return vertices * 16 + len(self.values) * GROUP_OVERHEAD
+
+    def add_partial(self, key, values, bounds, hull):
+        """Merge a partial result of another aggregator, see ``drain``"""
+        if key not in self.values:
+            self.add_group(key, values)
+        if bounds is not None:
+            self.add_bounds(key, *bounds)
+        if hull is not None and len(hull):
+            self.partials.setdefault(key, []).append(hull)
+            self.pending_vertices += len(hull)
+            if self.pending_vertices >= self.flush_vertices:
+                self.flush()
+
+    def drain(self):
+        """Yield (key, values, bounds, hull) partials and reset the state"""
+        self.flush()
+        for key, values in self.values.items():
+            yield key, values, self.bounds.get(key), self.hulls.get(key)
+        self.values = {}
+        self.bounds = {}
+        self.hulls = {}
+        self.hull_vertices = 0
+
+    def rollup(self, parent_key):
+        """Merge the groups into coarser groups keyed by ``parent_key(key)``
+
+        Works on the running envelopes and hulls only, so no feature is
+        read again. Each coarse group keeps the values of its first group.
+        """
+        self.flush()
+        parent = GroupAggregator(
+            self.geometry_type, self.flush_vertices, self.measure, self.tolerance,
+            self.transform
+        )
+        for key, values in self.values.items():
+            parent.add_partial(
+                parent_key(key), values, self.bounds.get(key), self.hulls.get(key)
+            )
+        parent.flush()
+        return parent
+
+    def results(self):
+        """Yield (key, values, ring, measurements) for every group with a geometry
+
+        Measurements are None unless the aggregator measures.
+        """
+        self.flush()
+        keys = [key for key in self.values
+                if key in self.bounds or key in self.hulls]
+
+        if not self.keep_hulls:
+            bounds = np.array([self.bounds[key] for key in keys], dtype=np.float64)
+            if self.transform is not None and len(keys):
+                bounds = self.transform.bounds(bounds)
+            coords = bounds.reshape(-1, 2)
+            offsets = np.arange(0, 2 * len(keys) + 1, 2)
+        else:
+            coords, offsets = geometry_engine.pack_coordinates(
+                [self.hulls[key] for key in keys]
+            )
+
+        if self.measure:
+            rings, measurements = geometry_engine.bounding_rings(
+                coords, offsets, self.geometry_type, measure=True
+            )
+        else:
+            rings = geometry_engine.bounding_rings(coords, offsets, self.geometry_type)
+            measurements = [None] * len(rings)
+        for key, ring, row in zip(keys, rings, measurements):
+            if ring is not None:
+                yield key, self.values[key], ring, row
@@ -0,0 +1,207 @@
+from qgis.core import (
+    QgsFeatureRequest, QgsProcessing, QgsProcessingAlgorithm, QgsProcessingException,
+    QgsProcessingFeatureSourceDefinition, QgsProcessingParameterBoolean,
+    QgsProcessingParameterCrs, QgsProcessingParameterEnum,
+    QgsProcessingParameterFeatureSink,
+    QgsProcessingParameterFeatureSource, QgsProcessingParameterField,
+    QgsProcessingParameterNumber, QgsProcessingParameterDefinition,
+    QgsWkbTypes
+)
+
+from .buffered_sink import DEFAULT_BATCH_SIZE
+from .defaults import DEFAULT_CHUNK_SIZE, VERTEX_FILTERS, filter_tolerance
+from .pushdown import LayerSource
+
+GEOMETRY_TYPES = [
+    "Envelope (Bounding Box)",
+    "Minimum Oriented Rectangle",
+    "Circle",
+    "Convex Hull"
+]
+
+
+class MinimumBoundingBoxAlgorithm(QgsProcessingAlgorithm):
+    """Processing wrapper around BoundingGeometryProcessor
+
+    Runs without dialogs or project side effects, so it works in the
+    batch runner, in models and through qgis_process.
+    """
+
+    INPUT = 'INPUT'
+    GEOMETRY_TYPE = 'GEOMETRY_TYPE'
+    GROUP_FIELD = 'GROUP_FIELD'
+    GROUP_LEVELS = 'GROUP_LEVELS'
+    ROLLUP = 'ROLLUP'
+    FIELDS = 'FIELDS'
+    DISSOLVE = 'DISSOLVE'
+    MEASUREMENTS = 'MEASUREMENTS'
+    TARGET_CRS = 'TARGET_CRS'
+    WORKERS = 'WORKERS'
+    CHUNK_SIZE = 'CHUNK_SIZE'
+    BATCH_SIZE = 'BATCH_SIZE'
+    MEMORY_LIMIT = 'MEMORY_LIMIT'
+    VERTEX_FILTER = 'VERTEX_FILTER'
+    TOLERANCE = 'TOLERANCE'
+    OUTPUT = 'OUTPUT'
+
+    def name(self):
+        return 'minimumboundingbox'
+
+    def displayName(self):
+        return 'Minimum bounding geometry'
+
+    def shortHelpString(self):
+        return (
+            "Creates a bounding geometry (envelope, oriented rectangle, "
+            "circle or convex hull) for each feature, or for each group of "
+            "features sharing a field value, with min_x, min_y, max_x, max_y "
+            "and extent attributes. Further group levels split the groups "
+            "by more fields, and the rollup option also writes every "
+            "coarser level from the same pass. Measurements add the oriented width, "
+            "height and angle, the area, perimeter and hull fill ratio. "
+            "With a target CRS the bounding geometries are computed from "
+            "the reprojected input, envelopes from densified extents."
+        )
+
+    def createInstance(self):
+        return MinimumBoundingBoxAlgorithm()
+
+    def initAlgorithm(self, config=None):
+        self.addParameter(QgsProcessingParameterFeatureSource(
+            self.INPUT, 'Input layer', [QgsProcessing.TypeVectorAnyGeometry]
+        ))
+        self.addParameter(QgsProcessingParameterEnum(
+            self.GEOMETRY_TYPE, 'Geometry type', options=GEOMETRY_TYPES, defaultValue=0
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.GROUP_FIELD, 'Group by field', parentLayerParameterName=self.INPUT,
+            optional=True
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.GROUP_LEVELS, 'Further group levels, coarsest first',
+            parentLayerParameterName=self.INPUT, allowMultiple=True, optional=True
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.ROLLUP, 'Also output the coarser group levels', defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterField(
+            self.FIELDS, 'Fields to keep', parentLayerParameterName=self.INPUT,
+            allowMultiple=True, optional=True
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.DISSOLVE, 'Dissolve geometries before computing (slower)',
+            defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterBoolean(
+            self.MEASUREMENTS,
+            'Add width, height, angle, area, perimeter and fill ratio fields',
+            defaultValue=False
+        ))
+        self.addParameter(QgsProcessingParameterCrs(
+            self.TARGET_CRS, 'Output CRS (default: input CRS)', optional=True
+        ))
+
+        advanced = [
+            QgsProcessingParameterNumber(
+                self.WORKERS, 'Parallel workers (0 = off)',
+                QgsProcessingParameterNumber.Integer, defaultValue=0, minValue=0
+            ),
+            QgsProcessingParameterNumber(
+                self.CHUNK_SIZE, 'Chunk size',
+                QgsProcessingParameterNumber.Integer,
+                defaultValue=DEFAULT_CHUNK_SIZE, minValue=1
+            ),
+            QgsProcessingParameterNumber(
+                self.BATCH_SIZE, 'Write batch size',
+                QgsProcessingParameterNumber.Integer,
+                defaultValue=DEFAULT_BATCH_SIZE, minValue=1
+            ),
+            QgsProcessingParameterNumber(
+                self.MEMORY_LIMIT, 'Group memory limit in MB (0 = no limit)',
+                QgsProcessingParameterNumber.Integer, defaultValue=0, minValue=0
+            ),
+            QgsProcessingParameterEnum(
+                self.VERTEX_FILTER, 'Vertex pre-filter', options=VERTEX_FILTERS,
+                defaultValue=0
+            ),
+            QgsProcessingParameterNumber(
+                self.TOLERANCE, 'Approximate pre-filter tolerance',
+                QgsProcessingParameterNumber.Double, defaultValue=1.0, minValue=0
+            ),
+        ]
+        for parameter in advanced:
+            parameter.setFlags(parameter.flags() | QgsProcessingParameterDefinition.FlagAdvanced)
+            self.addParameter(parameter)
+
+        self.addParameter(QgsProcessingParameterFeatureSink(
+            self.OUTPUT, 'Minimum bounding geometry', QgsProcessing.TypeVectorPolygon
+        ))
+
+    def processAlgorithm(self, parameters, context, feedback):
+        # The provider is registered at QGIS startup, the engine loads on first use
+        from .processor import BoundingGeometryProcessor
+
+        source = self.parameterAsSource(parameters, self.INPUT, context)
+        if source is None:
+            raise QgsProcessingException(self.invalidSourceError(parameters, self.INPUT))
+
+        processor = BoundingGeometryProcessor(
+            self.parameterAsEnum(parameters, self.GEOMETRY_TYPE, context),
+            self.parameterAsString(parameters, self.GROUP_FIELD, context) or None,
+            self.parameterAsFields(parameters, self.FIELDS, context),
+            self.parameterAsBoolean(parameters, self.DISSOLVE, context),
+            self.parameterAsInt(parameters, self.WORKERS, context),
+            self.parameterAsInt(parameters, self.CHUNK_SIZE, context),
+            self.parameterAsInt(parameters, self.BATCH_SIZE, context),
+            measure=self.parameterAsBoolean(parameters, self.MEASUREMENTS, context),
+            group_levels=self.parameterAsFields(parameters, self.GROUP_LEVELS, context),
+            rollup=self.parameterAsBoolean(parameters, self.ROLLUP, context),
+            memory_limit=self.parameterAsInt(parameters, self.MEMORY_LIMIT, context),
+            tolerance=filter_tolerance(
+                self.parameterAsEnum(parameters, self.VERTEX_FILTER, context),
+                self.parameterAsDouble(parameters, self.TOLERANCE, context)
+            ),
+            target_crs=self.parameterAsCrs(parameters, self.TARGET_CRS, context)
+        )
+        processor.set_transform(source.sourceCrs(), context.transformContext())
+
+        fields = processor.output_fields(source.fields())
+        sink, dest_id = self.parameterAsSink(
+            parameters, self.OUTPUT, context, fields,
+            QgsWkbTypes.Polygon, processor.output_crs(source.sourceCrs())
+        )
+        if sink is None:
+            raise QgsProcessingException(self.invalidSinkError(parameters, self.OUTPUT))
+
+        processor.process(
+            source, source.fields(), sink, fields, feedback,
+            source.featureCount(), self.layer_source
+        )
+        return {self.OUTPUT: dest_id}
+
+    def prepareAlgorithm(self, parameters, context, feedback):
+        # Runs on the main thread, the only place the input layer may be read
+        self.layer_source = self.pushdown_source(parameters, context)
+        return True
+
+    def pushdown_source(self, parameters, context):
+        """Input layer details for database push-down, None when the source is filtered"""
+        definition = parameters.get(self.INPUT)
+        geometry_check = context.invalidGeometryCheck()
+        if isinstance(definition, QgsProcessingFeatureSourceDefinition):
+            if (
+                definition.selectedFeaturesOnly
+                or definition.featureLimit != -1
+                or getattr(definition, 'filterExpression', '')
+                or definition.flags & QgsProcessingFeatureSourceDefinition.FlagCreateIndividualOutputPerInputFeature
+            ):
+                return None
+            if definition.flags & QgsProcessingFeatureSourceDefinition.FlagOverrideDefaultGeometryCheck:
+                geometry_check = definition.geometryCheck
+        # Features with invalid geometries are dropped while reading, SQL would count them
+        if geometry_check == QgsFeatureRequest.GeometrySkipInvalid:
+            return None
+        layer = self.parameterAsVectorLayer(parameters, self.INPUT, context)
+        if layer is None:
+            return None
+        return LayerSource(layer)
@@ -0,0 +1,311 @@
+import os
+import shutil
+import tempfile
+import time
+
+from qgis.core import (
+    Qgis, QgsFeature, QgsMessageLog, QgsProcessingUtils, QgsProject, QgsTask, QgsVectorFileWriter,
+    QgsVectorLayer, QgsVectorLayerFeatureSource, QgsWkbTypes
+)
+
+from .buffered_sink import BufferedSink
+from .cache import TeeSink
+from .columnar import ColumnarSink, columnar_format
+from .instrumentation import RunStats
+from .pushdown import LayerSource
+
+REPORT_DIR = os.path.join(tempfile.gettempdir(), 'minimum_bounding_box')
+
+
+class BoundingBoxTask(QgsTask):
+    """Runs a BoundingGeometryProcessor in the background
+
+    The output layer is added to the project from ``finished``, which
+    QGIS calls on the main thread.
+    """
+
+    def __init__(self, iface, layer, processor, output, is_file, on_layer_added=None,
+                 profile=False, scope=None, cache=None):
+        super().__init__("Creating minimum bounding geometries", QgsTask.CanCancel)
+        self.iface = iface
+        self.stats = RunStats(profile)
+        self.on_layer_added = on_layer_added
+        if not is_file and processor.memory_limit:
+            # A memory layer would hold the whole output in RAM
+            output = QgsProcessingUtils.generateTempFilename(f"{output}.gpkg")
+            is_file = True
+        self.processor = processor
+        self.output = output
+        self.is_file = is_file
+        self.scope = scope
+        self.cache = cache
+        self.exception = None
+
+        # Everything touching the layer is captured on the main thread
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.layer_source = LayerSource(layer)
+        self.feature_count = layer.featureCount()
+        # The layer may be removed before the task finishes
+        self.layer_name = layer.name()
+        self.source_fields = layer.fields()
+        self.fields = processor.output_fields(self.source_fields)
+        self.transform_context = QgsProject.instance().transformContext()
+        processor.set_transform(layer.crs(), self.transform_context)
+        self.crs = processor.output_crs(layer.crs())
+        self.cache_key = cache.key(layer, processor, scope) if cache is not None else None
+
+        self.output_layer = None
+        if not is_file:
+            self.output_layer = QgsVectorLayer(
+                f"Polygon?crs={self.crs.authid()}",
+                output,
+                "memory"
+            )
+            self.output_layer.dataProvider().addAttributes(self.fields)
+            self.output_layer.updateFields()
+
+    def run(self):
+        columnar = None
+        try:
+            request = None
+            feature_count = self.feature_count
+            # Push-down reads the whole table, only use it for full layers
+            layer_source = self.layer_source
+            if self.scope is not None and self.scope.is_partial:
+                with self.stats.phase('iteration'):
+                    request = self.scope.request(self.source)
+                feature_count = self.scope.feature_count(request, feature_count)
+                layer_source = None
+
+            cached = None
+            if self.cache_key is not None:
+                cached = self.cache.lookup(self.cache_key)
+                self.stats.count('cache_hits' if cached else 'cache_misses')
+
+            writer = None
+            if self.is_file and columnar_format(self.output):
+                sink = columnar = ColumnarSink(self.output, self.fields, self.crs)
+            elif self.is_file:
+                writer_options = QgsVectorFileWriter.SaveVectorOptions()
+                writer_options.driverName = "GPKG" if self.output.lower().endswith('.gpkg') else "ESRI Shapefile"
+                if cached and writer_options.driverName == "GPKG":
+                    # A repeated run is a file copy
+                    with self.stats.phase('writing'):
+                        shutil.copyfile(cached, self.output)
+                    return True
+
+                writer = QgsVectorFileWriter.create(
+                    self.output,
+                    self.fields,
+                    QgsWkbTypes.Polygon,
+                    self.crs,
+                    self.transform_context,
+                    writer_options
+                )
+                if writer.hasError() != QgsVectorFileWriter.NoError:
+                    raise IOError(writer.errorMessage())
+
+                # The writer maps the output fields onto the file layout,
+                # including the GeoPackage fid, BufferedSink batches the calls
+                sink = writer
+            else:
+                sink = self.output_layer.dataProvider()
+
+            if cached:
+                success = self.copy_cached(cached, sink)
+            else:
+                success = self.process(sink, feature_count, layer_source, request)
+
+            if columnar is not None:
+                if success:
+                    with self.stats.phase('writing'):
+                        columnar.close()
+                else:
+                    columnar.abort()
+
+            # Close the output file
+            sink = writer = columnar = None
+            return success
+        except Exception as e:
+            if columnar is not None:
+                columnar.abort()
+            self.exception = e
+            return False
+
+    def process(self, sink, feature_count, layer_source, request):
+        """Run the processor, filling a new cache entry on the way if enabled"""
+        entry = None
+        if self.cache_key is not None:
+            entry = self.cache.writer(
+                self.cache_key, self.fields, self.crs, self.transform_context
+            )
+        if entry is None:
+            return self.processor.process(
+                self.source, self.source_fields, sink, self.fields, self,
+                feature_count, layer_source, request=request, stats=self.stats
+            )
+
+        path, cache_writer = entry
+        entry = None
+        tee = TeeSink(sink, cache_writer)
+        try:
+            success = self.processor.process(
+                self.source, self.source_fields, tee, self.fields, self,
+                feature_count, layer_source, request=request, stats=self.stats
+            )
+        finally:
+            # Close the file before publishing or dropping it
+            tee.cache_sink = cache_writer = None
+        if success and not tee.failed:
+            self.cache.store(self.cache_key, path)
+        else:
+            self.cache.discard(path)
+        return success
+
+    def copy_cached(self, path, sink):
+        """Write the features of a cached result to the output sink"""
+        cached_layer = QgsVectorLayer(path, "cache", "ogr")
+        if not cached_layer.isValid():
+            raise IOError(f"Could not read the cached result {path}")
+
+        # The GeoPackage adds its own fid field, match the fields by name
+        cached_fields = cached_layer.fields()
+        indexes = [cached_fields.lookupField(name) for name in self.fields.names()]
+
+        buffered = BufferedSink(sink, self.processor.batch_size)
+        with self.stats.phase('writing'):
+            for current, cached_feature in enumerate(cached_layer.getFeatures()):
+                if current % 1000 == 0 and self.isCanceled():
+                    return False
+                attributes = cached_feature.attributes()
+                feature = QgsFeature(self.fields)
+                feature.setGeometry(cached_feature.geometry())
+                feature.setAttributes([attributes[index] for index in indexes])
+                buffered.addFeature(feature)
+                self.stats.count('features_written')
+            buffered.flush()
+        return True
+
+    def finished(self, result):
+        if not result:
+            if self.exception is not None:
+                QgsMessageLog.logMessage(
+                    str(self.exception), "Minimum Bounding Box", Qgis.Critical
+                )
+                self.show_message("Error", f"Error processing features: {self.exception}", 2)
+            else:
+                self.show_message("Canceled", "Minimum bounding box task was canceled", 1)
+            return
+
+        with self.stats.phase('loading'):
+            if not self.add_output_layer():
+                return
+        self.stats.wall += self.stats.times['loading']
+        self.report_stats()
+
+        if self.on_layer_added is not None and self.output_layer is not None:
+            self.on_layer_added(self.output_layer)
+
+        if self.output_layer is None:
+            self.show_message("Success", f"Minimum bounding geometries written to {self.output}", 0)
+        else:
+            self.show_message("Success", "Minimum bounding geometries created successfully", 0)
+
+    def add_output_layer(self):
+        if self.is_file and columnar_format(self.output):
+            # OGR reads GeoParquet and Arrow when GDAL was built with them
+            saved_layer = None
+            if columnar_format(self.output) != 'columns':
+                saved_layer = QgsVectorLayer(
+                    self.output, os.path.splitext(os.path.basename(self.output))[0], "ogr"
+                )
+            if saved_layer is not None and saved_layer.isValid():
+                QgsProject.instance().addMapLayer(saved_layer)
+                self.output_layer = saved_layer
+        elif self.is_file:
+            # Load the saved file
+            saved_layer = QgsVectorLayer(
+                self.output, self.output.split('/')[-1].split('.')[0], "ogr"
+            )
+            if not saved_layer.isValid():
+                self.show_message("Error", "Failed to load the saved layer", 2)
+                return False
+            QgsProject.instance().addMapLayer(saved_layer)
+            self.output_layer = saved_layer
+        else:
+            QgsProject.instance().addMapLayer(self.output_layer)
+        return True
+
+    def report_stats(self):
+        """Log the phase timings and save them, with the profile if any, as JSON"""
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        base = os.path.join(REPORT_DIR, time.strftime('run_%Y%m%d_%H%M%S'))
+        self.stats.write_json(
+            base + '.json',
+            layer=self.layer_name,
+            output=self.output,
+            feature_count=self.feature_count,
+            scope=self.scope.scope if self.scope is not None else None,
+            geometry_type=self.processor.geometry_type,
+            group_field=self.processor.group_field,
+            group_levels=self.processor.group_levels,
+            crs=self.crs.authid(),
+        )
+        message = self.stats.summary() + f"\nReport: {base}.json"
+        if self.stats.profiler is not None:
+            self.stats.write_profile(base + '.prof')
+            message += f"\nProfile: {base}.prof"
+        QgsMessageLog.logMessage(message, "Minimum Bounding Box", Qgis.Info)
+
+    def show_message(self, title, message, level):
+        self.iface.messageBar().pushMessage(
+            title,
+            message,
+            level=level,
+            duration=5
+        )
+
+
+class BoundingBoxUpdateTask(QgsTask):
+    """Runs an IncrementalUpdater in the background"""
+
+    def __init__(self, iface, updater, quiet=False):
+        super().__init__("Updating minimum bounding geometries", QgsTask.CanCancel)
+        self.iface = iface
+        self.updater = updater
+        self.quiet = quiet
+        self.exception = None
+
+    def run(self):
+        try:
+            return self.updater.update(self)
+        except Exception as e:
+            self.exception = e
+            return False
+
+    def finished(self, result):
+        if not result:
+            if self.exception is not None:
+                QgsMessageLog.logMessage(
+                    str(self.exception), "Minimum Bounding Box", Qgis.Critical
+                )
+                self.show_message("Error", f"Error updating features: {self.exception}", 2)
+            return
+
+        self.updater.output_layer.triggerRepaint()
+        message = (
+            f"{self.updater.added} added, {self.updater.changed} changed, "
+            f"{self.updater.deleted} deleted"
+        )
+        if self.quiet:
+            QgsMessageLog.logMessage(message, "Minimum Bounding Box", Qgis.Info)
+        else:
+            self.show_message("Success", f"Minimum bounding geometries updated: {message}", 0)
+
+    def show_message(self, title, message, level):
+        self.iface.messageBar().pushMessage(
+            title,
+            message,
+            level=level,
+            duration=5
+        )
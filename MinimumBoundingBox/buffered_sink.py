@@ -0,0 +1,32 @@
+from qgis.core import QgsFeatureSink
+
+DEFAULT_BATCH_SIZE = 5000
+
+
+class BufferedSink:
+    """Collects output features and writes them with addFeatures in batches
+
+    Wraps any QgsFeatureSink (file writer, data provider, processing
+    sink). Call flush() once the last feature was added.
+    """
+
+    def __init__(self, sink, batch_size=DEFAULT_BATCH_SIZE):
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.buffer = []
+
+    def addFeature(self, feature):
+        self.buffer.append(feature)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        result = self.sink.addFeatures(self.buffer, QgsFeatureSink.FastInsert)
+        # Data providers also return the added features
+        success = result[0] if isinstance(result, tuple) else result
+        if not success:
+            error = self.sink.lastError() if hasattr(self.sink, 'lastError') else ''
+            raise IOError(f"Could not write output features: {error}")
+        self.buffer = []
@@ -0,0 +1,180 @@
+"""
+Persistent cache of computed bounding geometries.
+
+Results are stored as GeoPackages in the QGIS profile folder, keyed on
+the layer source, the modification stamp of the files behind it, the
+input scope and every processor option that changes the output. Only
+file based OGR layers without unsaved edits are cached, other providers
+have no cheap way to tell that the data did not change.
+
+The least recently used entries are dropped once the cache grows past
+its size limit.
+"""
+import hashlib
+import json
+import os
+
+from qgis.core import (
+    QgsApplication, QgsProviderRegistry, QgsVectorFileWriter, QgsWkbTypes
+)
+
+from .scope import SCOPE_EXTENT, SCOPE_SELECTED
+
+CACHE_DIR = os.path.join(
+    QgsApplication.qgisSettingsDirPath(), 'cache', 'minimum_bounding_box'
+)
+DEFAULT_CACHE_SIZE_MB = 512
+
+# Bump when the output of the processor changes for the same options
+CACHE_VERSION = 1
+
+# Files that change along with the main file of a data source
+SIDECARS = ('.dbf', '.shx', '.cpg', '.prj')
+
+
+def source_stamp(layer):
+    """Path, mtime and size of the files behind a layer, None if not a plain file"""
+    if layer.providerType() != 'ogr' or layer.isModified():
+        return None
+    path = QgsProviderRegistry.instance().decodeUri('ogr', layer.source()).get('path')
+    if not path or not os.path.isfile(path):
+        return None
+
+    stamps = []
+    base = os.path.splitext(path)[0]
+    for candidate in [path, path + '-wal'] + [base + suffix for suffix in SIDECARS]:
+        if os.path.isfile(candidate):
+            stat = os.stat(candidate)
+            stamps.append([candidate, stat.st_mtime_ns, stat.st_size])
+    return stamps
+
+
+class TeeSink:
+    """Writes every feature batch to a sink and to a cache entry
+
+    A failed cache write does not stop the run, it only sets ``failed`` so
+    the incomplete entry is dropped instead of stored.
+    """
+
+    def __init__(self, sink, cache_sink):
+        self.sink = sink
+        self.cache_sink = cache_sink
+        self.failed = False
+
+    def addFeatures(self, features, flags=0):
+        result = self.sink.addFeatures(features, flags)
+        if not self.failed and not self.cache_sink.addFeatures(features, flags):
+            self.failed = True
+        return result
+
+    def lastError(self):
+        return self.sink.lastError() if hasattr(self.sink, 'lastError') else ''
+
+
+class ResultCache:
+    def __init__(self, directory=CACHE_DIR, max_size_mb=DEFAULT_CACHE_SIZE_MB):
+        self.directory = directory
+        self.max_bytes = max_size_mb * 1024 * 1024
+
+    def key(self, layer, processor, scope=None):
+        """Cache key of a run, None when the layer can't be cached"""
+        stamp = source_stamp(layer)
+        if stamp is None:
+            return None
+
+        description = {
+            'version': CACHE_VERSION,
+            'source': layer.source(),
+            'crs': layer.crs().authid(),
+            'stamp': stamp,
+            'geometry_type': processor.geometry_type,
+            'group_field': processor.group_field,
+            'group_levels': processor.group_levels,
+            'rollup': processor.rollup,
+            'selected_fields': processor.selected_fields,
+            'use_union': processor.use_union,
+            'measure': processor.measure,
+            'track_source': processor.track_source,
+            'tolerance': processor.tolerance,
+            'target_crs': processor.target_crs.authid() if processor.target_crs else None,
+        }
+        if scope is not None and scope.scope == SCOPE_SELECTED:
+            description['selection'] = hashlib.sha256(
+                repr(sorted(scope.selected_ids)).encode('utf-8')
+            ).hexdigest()
+        elif scope is not None and scope.scope == SCOPE_EXTENT:
+            description['extent'] = scope.extent.toString(17)
+
+        encoded = json.dumps(description, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def entry_path(self, key):
+        return os.path.join(self.directory, key + '.gpkg')
+
+    def lookup(self, key):
+        """Path of a cached result, marked as recently used, or None"""
+        path = self.entry_path(key)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)
+        return path
+
+    def writer(self, key, fields, crs, transform_context):
+        """Start a cache entry, returns (temporary path, file writer) or None
+
+        ``store`` publishes the entry once the writer is released.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, key + '.part.gpkg')
+        options = QgsVectorFileWriter.SaveVectorOptions()
+        options.driverName = "GPKG"
+        options.layerName = "bounding_geometries"
+        writer = QgsVectorFileWriter.create(
+            path, fields, QgsWkbTypes.Polygon, crs, transform_context, options
+        )
+        if writer.hasError() != QgsVectorFileWriter.NoError:
+            del writer
+            self.discard(path)
+            return None
+        return path, writer
+
+    def store(self, key, path):
+        os.replace(path, self.entry_path(key))
+        self.evict()
+
+    def discard(self, path):
+        for candidate in (path, path + '-wal', path + '-shm'):
+            if os.path.isfile(candidate):
+                os.remove(candidate)
+
+    def entries(self):
+        """(mtime, size, path) of every entry, least recently used first"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.gpkg') and not name.endswith('.part.gpkg'):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Drop the least recently used entries until the cache fits"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            self.discard(path)
+            total -= size
+
+    def clear(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if '.gpkg' in name:
+                os.remove(os.path.join(self.directory, name))
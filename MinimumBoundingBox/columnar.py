@@ -0,0 +1,341 @@
+"""
+Columnar output of bounding results.
+
+Instead of going through QgsVectorFileWriter, output features are
+collected by column and written batch by batch as:
+
+- GeoParquet (``.parquet``), WKB geometries with the "geo" metadata
+- Arrow IPC (``.arrow``), uncompressed so readers can memory map it
+- a NumPy bundle (``.columns``), a folder with one ``.npy`` file per
+  field, text fields and the WKB geometries as a byte blob plus an
+  ``_offsets.npy`` file, and a ``columns.json`` describing them. Load
+  columns with ``np.load(path, mmap_mode='r')``.
+
+Only one batch of rows is held in memory at a time. Parquet and Arrow
+need pyarrow, the bundle only needs NumPy.
+"""
+import json
+import os
+import shutil
+
+from qgis.PyQt.QtCore import QVariant
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = {
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.columns': 'columns',
+}
+
+NUMERIC_TYPES = (
+    QVariant.Int, QVariant.UInt, QVariant.LongLong, QVariant.ULongLong,
+    QVariant.Double
+)
+
+# Rows collected before a record batch, row group or bundle chunk is written
+BATCH_ROWS = 65536
+
+
+def columnar_format(path):
+    """Columnar format of an output path, or None for other outputs"""
+    return FORMATS.get(os.path.splitext(path.lower())[1])
+
+
+def plain_value(value):
+    """Attribute value as a plain Python value, NULL becomes None"""
+    if value is None or (isinstance(value, QVariant) and value.isNull()):
+        return None
+    for method in ('toPyDateTime', 'toPyDate', 'toPyTime'):
+        if hasattr(value, method):
+            return getattr(value, method)()
+    return value
+
+
+def arrow_type(field):
+    """Arrow type of a QgsField, text for types without a better match"""
+    types = {
+        QVariant.Double: pa.float64(),
+        QVariant.Bool: pa.bool_(),
+        QVariant.Date: pa.date32(),
+        QVariant.DateTime: pa.timestamp('ms'),
+        QVariant.Time: pa.time64('us'),
+    }
+    if field.type() in types:
+        return types[field.type()]
+    if field.type() in NUMERIC_TYPES:
+        return pa.int64()
+    return pa.string()
+
+
+def text(value):
+    return None if value is None else str(value)
+
+
+class NpyStream:
+    """A one dimensional .npy file written in pieces
+
+    The length is only known at the end, so the data goes to a part file
+    first and ``close`` puts the header in front of it.
+    """
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        self.part = open(path + '.part', 'wb')
+
+    def append(self, values):
+        array = np.ascontiguousarray(values, dtype=self.dtype)
+        self.part.write(array.tobytes())
+        self.count += len(array)
+
+    def close(self):
+        self.part.close()
+        header = {
+            'descr': np.lib.format.dtype_to_descr(self.dtype),
+            'fortran_order': False,
+            'shape': (self.count,),
+        }
+        with open(self.path, 'wb') as f:
+            np.lib.format.write_array_header_1_0(f, header)
+            with open(self.part.name, 'rb') as part:
+                shutil.copyfileobj(part, f, 1 << 20)
+        os.remove(self.part.name)
+
+    def discard(self):
+        self.part.close()
+        os.remove(self.part.name)
+
+
+class BlobStream:
+    """Variable length byte values as a uint8 blob and int64 offsets"""
+
+    def __init__(self, path, offsets_path):
+        self.blob = NpyStream(path, np.uint8)
+        self.offsets = NpyStream(offsets_path, np.int64)
+        self.offsets.append([0])
+        self.end = 0
+
+    def append(self, values):
+        ends = self.end + np.cumsum([len(value) for value in values], dtype=np.int64)
+        self.blob.append(np.frombuffer(b''.join(values), dtype=np.uint8))
+        self.offsets.append(ends)
+        if len(ends):
+            self.end = int(ends[-1])
+
+    def close(self):
+        self.blob.close()
+        self.offsets.close()
+
+    def discard(self):
+        self.blob.discard()
+        self.offsets.discard()
+
+
+class ColumnarSink:
+    """Feature sink writing attributes and WKB geometries by column
+
+    Rows are written every BATCH_ROWS features, ``close`` completes the
+    output and ``abort`` removes it.
+    """
+
+    def __init__(self, path, fields, crs):
+        self.format = columnar_format(path)
+        if self.format is None:
+            raise ValueError(f"Not a columnar output: {path}")
+        if self.format in ('parquet', 'arrow') and pa is None:
+            raise ValueError(f"Writing {self.format} files needs the pyarrow package")
+        if self.format == 'columns' and np is None:
+            raise ValueError("Writing a column bundle needs the numpy package")
+
+        self.path = path
+        self.fields = fields
+        self.crs = crs
+        self.error = ''
+        self.count = 0
+        self.writer = self.file = None
+        self.streams = None
+        self.reset()
+        if self.format == 'columns':
+            self.open_bundle()
+        else:
+            self.open_arrow()
+
+    def reset(self):
+        self.columns = [[] for _ in range(self.fields.count())]
+        self.geometries = []
+
+    def addFeature(self, feature, flags=0):
+        return self.addFeatures([feature], flags)
+
+    def addFeatures(self, features, flags=0):
+        for feature in features:
+            for column, value in zip(self.columns, feature.attributes()):
+                column.append(plain_value(value))
+            self.geometries.append(
+                bytes(feature.geometry().asWkb()) if feature.hasGeometry() else None
+            )
+        if len(self.geometries) >= BATCH_ROWS:
+            try:
+                self.flush()
+            except (OSError, ValueError) as e:
+                self.error = str(e)
+                return False
+        return True
+
+    def lastError(self):
+        return self.error
+
+    def flush(self):
+        if not self.geometries:
+            return
+        if self.format == 'columns':
+            self.write_bundle_batch()
+        else:
+            self.writer.write_batch(self.record_batch())
+        self.count += len(self.geometries)
+        self.reset()
+
+    def close(self):
+        """Write the remaining rows and complete the output"""
+        self.flush()
+        if self.format == 'columns':
+            for streams in self.streams:
+                for stream in streams:
+                    stream.close()
+            self.write_bundle_description()
+        else:
+            self.close_writer()
+
+    def abort(self):
+        """Drop an unfinished output"""
+        if self.format == 'columns':
+            shutil.rmtree(self.path, ignore_errors=True)
+            return
+        try:
+            self.close_writer()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def close_writer(self):
+        writer, self.writer = self.writer, None
+        if writer is not None:
+            writer.close()
+        file, self.file = self.file, None
+        if file is not None:
+            file.close()
+
+    # Arrow and GeoParquet
+
+    def open_arrow(self):
+        schema = pa.schema(
+            [pa.field(field.name(), arrow_type(field)) for field in self.fields]
+            + [pa.field('geometry', pa.binary())],
+            metadata={b'geo': json.dumps(self.geo_metadata()).encode('utf-8')}
+        )
+        if self.format == 'parquet':
+            self.writer = pq.ParquetWriter(self.path, schema)
+        else:
+            self.file = pa.OSFile(self.path, 'wb')
+            self.writer = pa.ipc.new_file(self.file, schema)
+
+    def record_batch(self):
+        arrays = []
+        for field, values in zip(self.fields, self.columns):
+            field_type = arrow_type(field)
+            if field_type == pa.string():
+                values = [text(value) for value in values]
+            arrays.append(pa.array(values, type=field_type))
+        arrays.append(pa.array(self.geometries, type=pa.binary()))
+        return pa.RecordBatch.from_arrays(
+            arrays, names=self.fields.names() + ['geometry']
+        )
+
+    def geo_metadata(self):
+        column = {
+            'encoding': 'WKB',
+            'geometry_types': ['Polygon'],
+        }
+        if self.crs is not None and self.crs.isValid():
+            if hasattr(self.crs, 'toJsonString'):
+                # PROJJSON, QGIS 3.40 and later
+                column['crs'] = json.loads(self.crs.toJsonString())
+            else:
+                # Older QGIS can't write PROJJSON, GDAL and pyproj read WKT too
+                column['crs'] = self.crs.toWkt(self.crs.WKT2_2019)
+        else:
+            column['crs'] = None
+        return {
+            'version': '1.0.0',
+            'primary_column': 'geometry',
+            'columns': {'geometry': column},
+        }
+
+    # NumPy bundle
+
+    def open_bundle(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.streams = []
+        self.column_types = {}
+        for field in self.fields:
+            path = os.path.join(self.path, field.name())
+            if field.type() == QVariant.Double:
+                streams = [NpyStream(f'{path}.npy', np.float64)]
+            elif field.type() in NUMERIC_TYPES:
+                # Integers have no NaN, NULLs are listed in a mask
+                streams = [NpyStream(f'{path}.npy', np.int64), NpyStream(f'{path}.null.npy', bool)]
+            else:
+                streams = [BlobStream(f'{path}.npy', f'{path}_offsets.npy')]
+            self.streams.append(streams)
+            self.column_types[field.name()] = (
+                'utf8' if isinstance(streams[0], BlobStream) else str(streams[0].dtype)
+            )
+        self.streams.append([BlobStream(
+            os.path.join(self.path, 'geometry.npy'),
+            os.path.join(self.path, 'geometry_offsets.npy')
+        )])
+        self.nulls = [False] * self.fields.count()
+
+    def write_bundle_batch(self):
+        for i, values in enumerate(self.columns):
+            streams = self.streams[i]
+            if isinstance(streams[0], BlobStream):
+                streams[0].append(
+                    [('' if value is None else str(value)).encode('utf-8') for value in values]
+                )
+            elif len(streams) == 1:
+                streams[0].append([np.nan if value is None else value for value in values])
+            else:
+                mask = [value is None for value in values]
+                self.nulls[i] = self.nulls[i] or any(mask)
+                streams[0].append([0 if value is None else value for value in values])
+                streams[1].append(mask)
+        # One blob of WKB, feature i owns blob[offsets[i]:offsets[i + 1]]
+        self.streams[-1][0].append([wkb or b'' for wkb in self.geometries])
+
+    def write_bundle_description(self):
+        for i, streams in enumerate(self.streams[:-1]):
+            if len(streams) == 2 and not self.nulls[i]:
+                os.remove(streams[1].path)
+        with open(os.path.join(self.path, 'columns.json'), 'w') as f:
+            json.dump({
+                'count': self.count,
+                'columns': self.column_types,
+                'geometry': {
+                    'encoding': 'WKB',
+                    'data': 'geometry.npy',
+                    'offsets': 'geometry_offsets.npy',
+                },
+                'crs': self.crs.authid() if self.crs is not None else None,
+            }, f, indent=2)
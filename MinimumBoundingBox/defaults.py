@@ -0,0 +1,22 @@
+"""
+Defaults and option lists shared by the dialog, the Processing algorithm
+and the processor.
+
+Loaded when the plugin starts, so this module must stay free of NumPy
+and of the other plugin modules.
+"""
+# Features per chunk handed to the vectorized engine
+DEFAULT_CHUNK_SIZE = 10000
+
+# Vertex pre-filter modes, as listed in the dialog and the algorithm
+VERTEX_FILTERS = ["Off", "Exact (octagon filter)", "Approximate"]
+FILTER_OFF, FILTER_EXACT, FILTER_APPROXIMATE = range(3)
+
+
+def filter_tolerance(mode, tolerance):
+    """Processor tolerance for a vertex pre-filter mode"""
+    if mode == FILTER_EXACT:
+        return 0.0
+    if mode == FILTER_APPROXIMATE:
+        return tolerance
+    return None
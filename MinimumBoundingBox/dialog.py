@@ -0,0 +1,550 @@
+"""
+Dialogs of the Minimum Bounding Box plugin.
+
+Only imported when the dialog is first opened, see
+``MinimumBoundingBox.run``.
+"""
+from qgis.PyQt.QtWidgets import (
+    QDialog, QVBoxLayout, QLabel, QComboBox, QPushButton,
+    QDialogButtonBox, QListWidget, QListWidgetItem,
+    QCheckBox, QFileDialog, QHBoxLayout, QLineEdit,
+    QToolButton, QGroupBox, QSpinBox, QDoubleSpinBox
+)
+from qgis.core import (
+    QgsMapLayerProxyModel, QgsCoordinateReferenceSystem
+)
+from qgis.gui import (
+    QgsMapLayerComboBox, QgsFieldComboBox, QgsExtentGroupBox,
+    QgsFieldExpressionWidget, QgsProjectionSelectionWidget
+)
+from qgis.PyQt.QtCore import Qt
+import os.path
+
+from .buffered_sink import DEFAULT_BATCH_SIZE
+from .cache import DEFAULT_CACHE_SIZE_MB, ResultCache
+from .columnar import columnar_format
+from .defaults import (
+    DEFAULT_CHUNK_SIZE, FILTER_APPROXIMATE, VERTEX_FILTERS, filter_tolerance
+)
+from .processor import geometry_engine
+from .scope import InputScope, SCOPES, SCOPE_EXTENT
+
+class FieldSelectorDialog(QDialog):
+    def __init__(self, layer, parent=None):
+        super().__init__(parent)
+        self.layer = layer
+        self.setWindowTitle("Select Fields")
+        self.setup_ui()
+        self.setMinimumWidth(400)
+        self.setMinimumHeight(500)
+        
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # Field list
+        self.field_list = QListWidget()
+        self.field_list.setMinimumHeight(300)
+        layout.addWidget(self.field_list)
+        
+        layout.addSpacing(10)
+        
+        # Buttons
+        button_layout = QHBoxLayout()
+        button_layout.setSpacing(10)
+        
+        self.select_all_btn = QPushButton("Select All")
+        self.clear_btn = QPushButton("Clear Selection")
+        self.toggle_btn = QPushButton("Toggle Selection")
+        
+        for btn in [self.select_all_btn, self.clear_btn, self.toggle_btn]:
+            btn.setMinimumWidth(100)
+            btn.setMinimumHeight(30)
+        
+        self.select_all_btn.clicked.connect(self.select_all)
+        self.clear_btn.clicked.connect(self.clear_selection)
+        self.toggle_btn.clicked.connect(self.toggle_selection)
+        
+        button_layout.addWidget(self.select_all_btn)
+        button_layout.addWidget(self.clear_btn)
+        button_layout.addWidget(self.toggle_btn)
+        
+        layout.addLayout(button_layout)
+        layout.addSpacing(10)
+        
+        # OK/Cancel buttons
+        self.button_box = QDialogButtonBox(
+            QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        )
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
+        
+        self.setLayout(layout)
+        
+        if self.layer:
+            for field in self.layer.fields():
+                item = QListWidgetItem(field.name())
+                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+                item.setCheckState(Qt.Unchecked)
+                self.field_list.addItem(item)
+    
+    def select_all(self):
+        for i in range(self.field_list.count()):
+            self.field_list.item(i).setCheckState(Qt.Checked)
+    
+    def clear_selection(self):
+        for i in range(self.field_list.count()):
+            self.field_list.item(i).setCheckState(Qt.Unchecked)
+    
+    def toggle_selection(self):
+        for i in range(self.field_list.count()):
+            item = self.field_list.item(i)
+            item.setCheckState(Qt.Checked if item.checkState() == Qt.Unchecked else Qt.Unchecked)
+    
+    def get_selected_fields(self):
+        selected = []
+        for i in range(self.field_list.count()):
+            item = self.field_list.item(i)
+            if item.checkState() == Qt.Checked:
+                selected.append(item.text())
+        return selected
+
+class MBBDialog(QDialog):
+    def __init__(self, parent=None, canvas=None):
+        super().__init__(parent)
+        self.canvas = canvas
+        self.setWindowTitle("Minimum Bounding Box")
+        self.selected_fields = []
+        self.setup_ui()
+        self.setMinimumWidth(500)
+        self.setMinimumHeight(400)
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        layout.setSpacing(10)
+        layout.setContentsMargins(20, 20, 20, 20)
+        
+        # Layer selection
+        layout.addWidget(QLabel("Select Input Layer:"))
+        self.layer_combo = QgsMapLayerComboBox()
+        self.layer_combo.setFilters(QgsMapLayerProxyModel.VectorLayer)
+        self.layer_combo.setMinimumHeight(30)
+        layout.addWidget(self.layer_combo)
+        
+        layout.addSpacing(10)
+        
+        # Input scope
+        layout.addWidget(QLabel("Input Features:"))
+        self.scope_combo = QComboBox()
+        self.scope_combo.addItems(SCOPES)
+        self.scope_combo.setMinimumHeight(30)
+        self.scope_combo.currentIndexChanged.connect(self.toggle_extent)
+        layout.addWidget(self.scope_combo)
+        
+        self.extent_box = QgsExtentGroupBox()
+        self.extent_box.setTitle("Extent")
+        self.extent_box.setCheckable(False)
+        if self.canvas is not None:
+            self.extent_box.setMapCanvas(self.canvas)
+        # Drawing an extent needs the canvas, the dialog steps aside meanwhile
+        self.extent_box.toggleDialogVisibility.connect(self.toggle_visibility)
+        self.extent_box.setVisible(False)
+        self.layer_combo.layerChanged.connect(self.update_extent)
+        layout.addWidget(self.extent_box)
+        
+        layout.addSpacing(10)
+        
+        # Geometry type selection
+        layout.addWidget(QLabel("Select Geometry Type:"))
+        self.geometry_type = QComboBox()
+        self.geometry_type.addItems([
+            "Envelope (Bounding Box)",
+            "Minimum Oriented Rectangle",
+            "Circle",
+            "Convex Hull"
+        ])
+        self.geometry_type.setMinimumHeight(30)
+        layout.addWidget(self.geometry_type)
+        
+        self.union_check = QCheckBox("Dissolve geometries before computing (slower)")
+        self.union_check.setToolTip(
+            "Run a unary union on the input geometries first. Not needed for "
+            "envelopes, hulls, oriented rectangles or circles, which only "
+            "depend on the input vertices."
+        )
+        layout.addWidget(self.union_check)
+        
+        self.measure_check = QCheckBox("Add measurement fields")
+        self.measure_check.setToolTip(
+            "Width, height and angle of the minimum oriented rectangle, area "
+            "and perimeter of the output, and the convex hull fill ratio"
+        )
+        layout.addWidget(self.measure_check)
+        
+        reduction_layout = QHBoxLayout()
+        reduction_layout.addWidget(QLabel("Vertex pre-filter:"))
+        self.reduction_combo = QComboBox()
+        self.reduction_combo.addItems(VERTEX_FILTERS)
+        self.reduction_combo.setToolTip(
+            "Drop vertices that can't change the result before computing. "
+            "Exact keeps results identical, approximate also merges vertices "
+            "closer than the tolerance, moving none further than it. Batches "
+            "with most vertices on the hull, such as convex outlines, are "
+            "not filtered."
+        )
+        self.reduction_combo.currentIndexChanged.connect(self.toggle_tolerance)
+        reduction_layout.addWidget(self.reduction_combo)
+        
+        reduction_layout.addWidget(QLabel("Tolerance:"))
+        self.tolerance_spin = QDoubleSpinBox()
+        self.tolerance_spin.setDecimals(6)
+        self.tolerance_spin.setRange(0.0, 1e9)
+        self.tolerance_spin.setValue(1.0)
+        self.tolerance_spin.setSuffix(" map units")
+        self.tolerance_spin.setEnabled(False)
+        reduction_layout.addWidget(self.tolerance_spin)
+        reduction_layout.addStretch()
+        layout.addLayout(reduction_layout)
+        self.reduction_combo.setEnabled(geometry_engine is not None)
+        
+        crs_layout = QHBoxLayout()
+        crs_layout.addWidget(QLabel("Output CRS:"))
+        self.crs_widget = QgsProjectionSelectionWidget()
+        self.crs_widget.setOptionVisible(QgsProjectionSelectionWidget.CrsNotSet, True)
+        self.crs_widget.setNotSetText("Same as input layer")
+        self.crs_widget.setCrs(QgsCoordinateReferenceSystem())
+        self.crs_widget.setToolTip(
+            "Compute the bounding geometries in another CRS. Inputs are "
+            "reprojected in batches, envelopes through densified extents."
+        )
+        crs_layout.addWidget(self.crs_widget, 1)
+        layout.addLayout(crs_layout)
+        
+        layout.addSpacing(10)
+        
+        # Grouping options
+        group_box = QGroupBox("Grouping Options")
+        group_layout = QVBoxLayout()
+        
+        self.group_check = QCheckBox("Group by field")
+        self.group_check.stateChanged.connect(self.toggle_group_field)
+        group_layout.addWidget(self.group_check)
+        
+        self.group_field = QgsFieldComboBox()
+        self.group_field.setEnabled(False)
+        self.layer_combo.layerChanged.connect(self.group_field.setLayer)
+        group_layout.addWidget(self.group_field)
+        
+        group_layout.addWidget(QLabel("Finer levels (field or expression):"))
+        level_layout = QHBoxLayout()
+        self.level_expression = QgsFieldExpressionWidget()
+        self.level_expression.setLayer(self.layer_combo.currentLayer())
+        self.layer_combo.layerChanged.connect(self.level_expression.setLayer)
+        level_layout.addWidget(self.level_expression)
+        
+        self.add_level_button = QPushButton("Add")
+        self.add_level_button.clicked.connect(self.add_group_level)
+        level_layout.addWidget(self.add_level_button)
+        
+        self.remove_level_button = QPushButton("Remove")
+        self.remove_level_button.clicked.connect(self.remove_group_level)
+        level_layout.addWidget(self.remove_level_button)
+        group_layout.addLayout(level_layout)
+        
+        self.level_list = QListWidget()
+        self.level_list.setMaximumHeight(80)
+        self.layer_combo.layerChanged.connect(self.level_list.clear)
+        group_layout.addWidget(self.level_list)
+        
+        self.rollup_check = QCheckBox("Also output the coarser levels (rollup)")
+        self.rollup_check.setToolTip(
+            "Coarser groups are merged from the finer ones, the layer is read once"
+        )
+        group_layout.addWidget(self.rollup_check)
+        
+        self.group_widgets = [
+            self.group_field, self.level_expression, self.add_level_button,
+            self.remove_level_button, self.level_list, self.rollup_check
+        ]
+        for widget in self.group_widgets:
+            widget.setEnabled(False)
+        
+        group_box.setLayout(group_layout)
+        layout.addWidget(group_box)
+        
+        layout.addSpacing(10)
+        
+        # Field selection button
+        field_layout = QHBoxLayout()
+        field_layout.setSpacing(10)
+        self.field_label = QLabel("Selected Fields: 0")
+        self.field_button = QToolButton()
+        self.field_button.setText("...")
+        self.field_button.setMinimumWidth(40)
+        self.field_button.setMinimumHeight(30)
+        self.field_button.clicked.connect(self.show_field_selector)
+        
+        field_layout.addWidget(self.field_label)
+        field_layout.addWidget(self.field_button)
+        field_layout.addStretch()
+        layout.addLayout(field_layout)
+        
+        layout.addSpacing(10)
+        
+        # Output options
+        output_layout = QHBoxLayout()
+        output_layout.setSpacing(10)
+        layout.addWidget(QLabel("Output (leave empty for memory layer):"))
+        self.output_path = QLineEdit()
+        self.output_path.setPlaceholderText("Layer name or file path...")
+        self.output_path.setMinimumHeight(30)
+        output_layout.addWidget(self.output_path)
+        
+        self.browse_button = QPushButton("Browse...")
+        self.browse_button.setMinimumWidth(80)
+        self.browse_button.setMinimumHeight(30)
+        self.browse_button.clicked.connect(self.browse_output)
+        output_layout.addWidget(self.browse_button)
+        layout.addLayout(output_layout)
+        
+        layout.addSpacing(10)
+        
+        # Incremental update options
+        incremental_box = QGroupBox("Incremental Updates")
+        incremental_layout = QVBoxLayout()
+        
+        self.track_check = QCheckBox("Store source ids and hashes for incremental updates")
+        incremental_layout.addWidget(self.track_check)
+        
+        self.update_check = QCheckBox("Update an existing output layer instead")
+        self.update_check.stateChanged.connect(self.toggle_update_layer)
+        incremental_layout.addWidget(self.update_check)
+        
+        self.update_layer_combo = QgsMapLayerComboBox()
+        self.update_layer_combo.setFilters(QgsMapLayerProxyModel.PolygonLayer)
+        self.update_layer_combo.setEnabled(False)
+        incremental_layout.addWidget(self.update_layer_combo)
+        
+        self.follow_check = QCheckBox("Keep the output up to date when source edits are saved")
+        incremental_layout.addWidget(self.follow_check)
+        
+        incremental_box.setLayout(incremental_layout)
+        layout.addWidget(incremental_box)
+        
+        layout.addSpacing(10)
+        
+        # Performance options
+        performance_box = QGroupBox("Performance")
+        performance_layout = QHBoxLayout()
+        
+        performance_layout.addWidget(QLabel("Parallel workers:"))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(0, os.cpu_count() or 1)
+        self.workers_spin.setSpecialValueText("Off")
+        self.workers_spin.setToolTip(
+            "Compute ungrouped bounding geometries in worker processes"
+        )
+        performance_layout.addWidget(self.workers_spin)
+        
+        performance_layout.addWidget(QLabel("Chunk size:"))
+        self.chunk_spin = QSpinBox()
+        self.chunk_spin.setRange(100, 1000000)
+        self.chunk_spin.setSingleStep(1000)
+        self.chunk_spin.setValue(DEFAULT_CHUNK_SIZE)
+        performance_layout.addWidget(self.chunk_spin)
+        
+        performance_layout.addWidget(QLabel("Write batch size:"))
+        self.batch_spin = QSpinBox()
+        self.batch_spin.setRange(1, 1000000)
+        self.batch_spin.setSingleStep(1000)
+        self.batch_spin.setValue(DEFAULT_BATCH_SIZE)
+        self.batch_spin.setToolTip(
+            "Number of output features written per addFeatures call"
+        )
+        performance_layout.addWidget(self.batch_spin)
+        
+        performance_layout.addWidget(QLabel("Memory limit (MB):"))
+        self.memory_spin = QSpinBox()
+        self.memory_spin.setRange(0, 1000000)
+        self.memory_spin.setSingleStep(256)
+        self.memory_spin.setSpecialValueText("Off")
+        self.memory_spin.setToolTip(
+            "Spill grouped partial results to temporary files past this size, "
+            "and write memory outputs to a temporary GeoPackage"
+        )
+        performance_layout.addWidget(self.memory_spin)
+        
+        self.profile_check = QCheckBox("Profile")
+        self.profile_check.setToolTip(
+            "Capture a cProfile of the run next to the timing report"
+        )
+        performance_layout.addWidget(self.profile_check)
+        performance_layout.addStretch()
+        
+        performance_box.setLayout(performance_layout)
+        self.workers_spin.setEnabled(geometry_engine is not None)
+        self.chunk_spin.setEnabled(geometry_engine is not None)
+        self.memory_spin.setEnabled(geometry_engine is not None)
+        layout.addWidget(performance_box)
+        
+        layout.addSpacing(10)
+        
+        # Result cache options
+        cache_box = QGroupBox("Result Cache")
+        cache_layout = QHBoxLayout()
+        
+        self.cache_check = QCheckBox("Reuse results of identical runs")
+        self.cache_check.setChecked(False)
+        self.cache_check.setToolTip(
+            "Only for unedited file based layers, the cache is invalidated "
+            "when the file changes"
+        )
+        cache_layout.addWidget(self.cache_check)
+        
+        cache_layout.addWidget(QLabel("Size limit (MB):"))
+        self.cache_size_spin = QSpinBox()
+        self.cache_size_spin.setRange(1, 1000000)
+        self.cache_size_spin.setValue(DEFAULT_CACHE_SIZE_MB)
+        cache_layout.addWidget(self.cache_size_spin)
+        
+        self.cache_label = QLabel()
+        cache_layout.addWidget(self.cache_label)
+        
+        self.clear_cache_button = QPushButton("Clear")
+        self.clear_cache_button.clicked.connect(self.clear_cache)
+        cache_layout.addWidget(self.clear_cache_button)
+        cache_layout.addStretch()
+        
+        cache_box.setLayout(cache_layout)
+        layout.addWidget(cache_box)
+        self.update_cache_label()
+        
+        layout.addSpacing(20)
+        
+        # OK/Cancel buttons
+        self.button_box = QDialogButtonBox(
+            QDialogButtonBox.Ok | QDialogButtonBox.Cancel
+        )
+        for button in self.button_box.buttons():
+            button.setMinimumWidth(80)
+            button.setMinimumHeight(30)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box)
+        
+        self.setLayout(layout)
+        
+        # Initialize fields
+        self.update_fields()
+        self.update_extent(self.layer_combo.currentLayer())
+
+    def toggle_group_field(self, state):
+        for widget in self.group_widgets:
+            widget.setEnabled(bool(state))
+
+    def add_group_level(self):
+        level, is_expression, is_valid = self.level_expression.currentField()
+        if level and is_valid:
+            self.level_list.addItem(level)
+
+    def remove_group_level(self):
+        for item in self.level_list.selectedItems():
+            self.level_list.takeItem(self.level_list.row(item))
+
+    def get_group_levels(self):
+        return [self.level_list.item(i).text() for i in range(self.level_list.count())]
+
+    def toggle_tolerance(self, index):
+        self.tolerance_spin.setEnabled(index == FILTER_APPROXIMATE)
+
+    def get_tolerance(self):
+        return filter_tolerance(
+            self.reduction_combo.currentIndex(), self.tolerance_spin.value()
+        )
+
+    def get_target_crs(self):
+        """Selected output CRS, None to keep the input layer CRS"""
+        crs = self.crs_widget.crs()
+        return crs if crs.isValid() else None
+
+    def toggle_extent(self, index):
+        self.extent_box.setVisible(index == SCOPE_EXTENT)
+
+    def toggle_visibility(self, visible):
+        self.setVisible(visible)
+        if visible:
+            self.raise_()
+            self.activateWindow()
+
+    def update_extent(self, layer):
+        """Express the extent in the layer CRS, starting from the canvas extent"""
+        if not layer:
+            return
+        self.extent_box.setOriginalExtent(layer.extent(), layer.crs())
+        self.extent_box.setOutputCrs(layer.crs())
+        if self.canvas is not None:
+            self.extent_box.setCurrentExtent(
+                self.canvas.extent(), self.canvas.mapSettings().destinationCrs()
+            )
+            self.extent_box.setOutputExtentFromCurrent()
+        else:
+            self.extent_box.setOutputExtentFromOriginal()
+
+    def get_scope(self, layer):
+        scope = self.scope_combo.currentIndex()
+        extent = self.extent_box.outputExtent() if scope == SCOPE_EXTENT else None
+        return InputScope(layer, scope, extent)
+
+    def get_cache(self):
+        if not self.cache_check.isChecked():
+            return None
+        return ResultCache(max_size_mb=self.cache_size_spin.value())
+
+    def clear_cache(self):
+        ResultCache().clear()
+        self.update_cache_label()
+
+    def update_cache_label(self):
+        size = ResultCache().size() / (1024 * 1024)
+        self.cache_label.setText(f"Used: {size:.1f} MB")
+
+    def toggle_update_layer(self, state):
+        self.update_layer_combo.setEnabled(bool(state))
+        self.output_path.setEnabled(not state)
+        self.browse_button.setEnabled(not state)
+
+    def browse_output(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Output Layer",
+            "",
+            "GeoPackage (*.gpkg);;Shapefile (*.shp);;GeoParquet (*.parquet);;"
+            "Arrow IPC (*.arrow);;NumPy column bundle (*.columns)"
+        )
+        if file_path:
+            self.output_path.setText(file_path)
+
+    def update_fields(self):
+        self.selected_fields = []
+        self.field_label.setText("Selected Fields: 0")
+
+    def show_field_selector(self):
+        layer = self.layer_combo.currentLayer()
+        if not layer:
+            return
+            
+        dialog = FieldSelectorDialog(layer, self)
+        if dialog.exec_():
+            self.selected_fields = dialog.get_selected_fields()
+            self.field_label.setText(f"Selected Fields: {len(self.selected_fields)}")
+    
+    def get_selected_fields(self):
+        return self.selected_fields
+        
+    def get_output_info(self):
+        path = self.output_path.text().strip()
+        if path.lower().endswith(('.gpkg', '.shp')) or columnar_format(path):
+            return True, path
+        return False, path or "Minimum_Bounding_Box"
@@ -0,0 +1,856 @@
+"""
+Vectorized bounding geometry engine.
+
+Works on packed coordinate arrays instead of QgsGeometry objects, so it
+can be imported and tested without QGIS. Coordinates of all features are
+stored in a single (N, 2) float array, and feature ``i`` owns the rows
+``coords[offsets[i]:offsets[i + 1]]``.
+
+The geometry type constants match the indexes of the plugin dialog.
+"""
+import random
+import struct
+
+import numpy as np
+
+ENVELOPE = 0
+ORIENTED_RECTANGLE = 1
+CIRCLE = 2
+CONVEX_HULL = 3
+
+CIRCLE_SEGMENTS = 36
+
+# Largest hull solved together with others by the enclosing circle kernel
+LOCKSTEP_VERTICES = 64
+
+# Columns of the measurement arrays, see ``bounding_rings``
+MEASUREMENTS = ('width', 'height', 'angle', 'area', 'perimeter', 'fill_ratio')
+
+_TAU = 2.0 * np.pi
+
+_COORD_DTYPE = np.dtype('<f8')
+
+
+# ---------------------------------------------------------------------------
+# WKB reading and writing
+# ---------------------------------------------------------------------------
+
+def _wkb_dimensions(wkb_type):
+    """Split a WKB type code into (base type, coordinate dimension)."""
+    has_z = bool(wkb_type & 0x80000000)
+    has_m = bool(wkb_type & 0x40000000)
+    wkb_type &= 0x0FFFFFFF
+    if wkb_type >= 3000:
+        has_z = has_m = True
+    elif wkb_type >= 2000:
+        has_m = True
+    elif wkb_type >= 1000:
+        has_z = True
+    return wkb_type % 1000, 2 + has_z + has_m
+
+
+def _read_wkb(buffer, pos, parts):
+    order = '<' if buffer[pos] == 1 else '>'
+    raw_type, = struct.unpack_from(order + 'I', buffer, pos + 1)
+    pos += 5
+    if raw_type & 0x20000000:  # EWKB SRID
+        pos += 4
+    base_type, dim = _wkb_dimensions(raw_type)
+    dtype = np.dtype(order + 'f8')
+
+    if base_type == 1:  # Point
+        point = np.frombuffer(buffer, dtype, dim, pos)
+        if not np.isnan(point[:2]).any():
+            parts.append(point[:2].reshape(1, 2))
+        return pos + 8 * dim
+
+    if base_type == 2:  # LineString
+        rings = 1
+    elif base_type == 3:  # Polygon
+        rings, = struct.unpack_from(order + 'I', buffer, pos)
+        pos += 4
+    elif base_type in (4, 5, 6, 7):  # Multi* and GeometryCollection
+        count, = struct.unpack_from(order + 'I', buffer, pos)
+        pos += 4
+        for _ in range(count):
+            pos = _read_wkb(buffer, pos, parts)
+        return pos
+    else:
+        raise ValueError(f"Unsupported WKB geometry type: {raw_type}")
+
+    for _ in range(rings):
+        count, = struct.unpack_from(order + 'I', buffer, pos)
+        pos += 4
+        if count:
+            points = np.frombuffer(buffer, dtype, count * dim, pos)
+            parts.append(points.reshape(count, dim)[:, :2])
+        pos += 8 * dim * count
+    return pos
+
+
+def wkb_coordinates(wkb):
+    """Return the (x, y) vertices of a linear WKB geometry as an array.
+
+    Z and M values are dropped. Curved geometry types raise ValueError and
+    have to be segmentized by the caller.
+    """
+    parts = []
+    if wkb:
+        _read_wkb(memoryview(wkb).cast('B'), 0, parts)
+    if not parts:
+        return np.empty((0, 2), dtype=_COORD_DTYPE)
+    return np.concatenate(parts).astype(_COORD_DTYPE, copy=False)
+
+
+def pack_wkb(wkbs):
+    """Pack a sequence of WKB geometries into (coords, offsets) arrays.
+
+    ``None`` or empty entries produce an empty feature.
+    """
+    arrays = [wkb_coordinates(wkb) for wkb in wkbs]
+    return pack_coordinates(arrays)
+
+
+def pack_coordinates(arrays):
+    """Pack a sequence of (n, 2) coordinate arrays into (coords, offsets)."""
+    offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+    if arrays:
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    if offsets[-1]:
+        coords = np.concatenate(arrays).astype(_COORD_DTYPE, copy=False)
+    else:
+        coords = np.empty((0, 2), dtype=_COORD_DTYPE)
+    return coords, offsets
+
+
+def polygon_wkb(ring):
+    """Build little endian Polygon WKB from a closed (n, 2) ring."""
+    ring = np.ascontiguousarray(ring, dtype=_COORD_DTYPE)
+    return struct.pack('<BIII', 1, 3, 1, len(ring)) + ring.tobytes()
+
+
+def linestring_wkb(coords):
+    """Build little endian LineString WKB from (n, 2) vertices."""
+    coords = np.ascontiguousarray(coords, dtype=_COORD_DTYPE)
+    return struct.pack('<BII', 1, 2, len(coords)) + coords.tobytes()
+
+
+# ---------------------------------------------------------------------------
+# Envelopes
+# ---------------------------------------------------------------------------
+
+def _segment_reduce(ufunc, values, offsets, fill):
+    """Apply ``ufunc.reduceat`` per feature, ``fill`` for empty features."""
+    counts = np.diff(offsets)
+    result = np.full(len(counts), fill, dtype=np.float64)
+    filled = counts > 0
+    if filled.any():
+        result[filled] = ufunc.reduceat(values, offsets[:-1][filled])
+    return result
+
+
+def envelopes(coords, offsets):
+    """Return an (n, 4) array of min_x, min_y, max_x, max_y per feature.
+
+    Empty features get NaN bounds.
+    """
+    x = coords[:, 0]
+    y = coords[:, 1]
+    return np.column_stack([
+        _segment_reduce(np.minimum, x, offsets, np.nan),
+        _segment_reduce(np.minimum, y, offsets, np.nan),
+        _segment_reduce(np.maximum, x, offsets, np.nan),
+        _segment_reduce(np.maximum, y, offsets, np.nan),
+    ])
+
+
+def densified_rectangles(bounds, points_per_side):
+    """Boundary points of (n, 4) rectangles as (coords, offsets).
+
+    Every side gets ``points_per_side`` evenly spaced points, starting at
+    its first corner. Rectangles with NaN bounds get no points.
+    """
+    bounds = np.asarray(bounds, dtype=_COORD_DTYPE).reshape(-1, 4)
+    valid = ~np.isnan(bounds).any(axis=1)
+    min_x, min_y, max_x, max_y = (column[:, None] for column in bounds[valid].T)
+    t = np.linspace(0.0, 1.0, points_per_side, endpoint=False)
+    width = max_x - min_x
+    height = max_y - min_y
+    low_x = np.broadcast_to(min_x, width.shape[:1] + t.shape)
+    high_x = np.broadcast_to(max_x, low_x.shape)
+    low_y = np.broadcast_to(min_y, low_x.shape)
+    high_y = np.broadcast_to(max_y, low_x.shape)
+    # Bottom, right, top and left side, counterclockwise
+    x = np.concatenate([min_x + t * width, high_x, max_x - t * width, low_x], axis=1)
+    y = np.concatenate([low_y, min_y + t * height, high_y, max_y - t * height], axis=1)
+
+    coords = np.column_stack([x.ravel(), y.ravel()])
+    offsets = np.zeros(len(bounds) + 1, dtype=np.int64)
+    np.cumsum(valid * 4 * points_per_side, out=offsets[1:])
+    return coords, offsets
+
+
+# ---------------------------------------------------------------------------
+# Vertex pre-filter
+# ---------------------------------------------------------------------------
+
+# Share of the vertices the octagon filter has to drop to save more hull
+# work than it costs, about half on dense outlines
+OCTAGON_MIN_DROP = 0.5
+# Every OCTAGON_SAMPLE_STRIDE-th feature of a batch is filtered first to
+# estimate that share, smaller batches are always filtered
+OCTAGON_SAMPLE_STRIDE = 16
+
+
+def _segment_argmin(values, feature_ids, offsets):
+    """Index of the first minimum of ``values`` per feature, -1 when empty."""
+    counts = np.diff(offsets)
+    minimums = _segment_reduce(np.minimum, values, offsets, np.inf)
+    hits = np.flatnonzero(values == minimums[feature_ids])
+    # Hits are in vertex order, so grouped by feature
+    features = feature_ids[hits]
+    first = np.ones(len(hits), dtype=bool)
+    first[1:] = features[1:] != features[:-1]
+    result = np.full(len(counts), -1)
+    result[features[first]] = hits[first]
+    return result
+
+
+def octagon_filter(coords, offsets):
+    """Drop the vertices strictly inside the Akl-Toussaint octagon of their feature.
+
+    The octagon joins the extreme vertices along x, y and both diagonals,
+    so whatever lies strictly inside it can't be a hull vertex or an
+    extreme. Hulls, envelopes, oriented rectangles and circles of the
+    remaining vertices are exactly those of the input.
+    """
+    n = len(offsets) - 1
+    if not len(coords):
+        return coords, offsets
+    counts = np.diff(offsets)
+    feature_ids = np.repeat(np.arange(n), counts)
+    x, y = coords[:, 0], coords[:, 1]
+    # Extremes in counter-clockwise order, starting from the leftmost
+    keys = (x, x + y, y, y - x, -x, -x - y, -y, x - y)
+    extremes = [_segment_argmin(key, feature_ids, offsets) for key in keys]
+    corners = [coords[extreme] for extreme in extremes]
+
+    inside = np.ones(len(coords), dtype=bool)
+    for k in range(8):
+        # Edge terms per feature, repeated out to the vertices
+        a = corners[k]
+        dx = corners[(k + 1) % 8][:, 0] - a[:, 0]
+        dy = corners[(k + 1) % 8][:, 1] - a[:, 1]
+        cross = (np.repeat(dx, counts) * (y - np.repeat(a[:, 1], counts))
+                 - np.repeat(dy, counts) * (x - np.repeat(a[:, 0], counts)))
+        # Repeated extremes give empty edges, which don't bound anything
+        empty = (dx == 0) & (dy == 0)
+        inside &= (cross > 0) | np.repeat(empty, counts)
+    for extreme in extremes:
+        inside[extreme[counts > 0]] = False
+
+    keep = ~inside
+    counts = np.bincount(feature_ids[keep], minlength=n)
+    return coords[keep], np.concatenate([[0], np.cumsum(counts)])
+
+
+def _drop_repeats(coords, offsets):
+    """Drop the vertices equal to the previous vertex of their feature."""
+    n = len(offsets) - 1
+    feature_ids = np.repeat(np.arange(n), np.diff(offsets))
+    keep = np.ones(len(coords), dtype=bool)
+    keep[1:] = (feature_ids[1:] != feature_ids[:-1]) | (coords[1:] != coords[:-1]).any(axis=1)
+    counts = np.bincount(feature_ids[keep], minlength=n)
+    return coords[keep], np.concatenate([[0], np.cumsum(counts)])
+
+
+def _octagon_pays(coords, offsets):
+    """Whether the octagon filter drops enough vertices of a sample of the features."""
+    n = len(offsets) - 1
+    if n < OCTAGON_SAMPLE_STRIDE:
+        return True
+    sample = np.arange(0, n, OCTAGON_SAMPLE_STRIDE)
+    counts = offsets[sample + 1] - offsets[sample]
+    sample_offsets = np.concatenate([[0], np.cumsum(counts)])
+    index = np.arange(sample_offsets[-1]) + np.repeat(offsets[sample] - sample_offsets[:-1], counts)
+    kept, _ = octagon_filter(coords[index], sample_offsets)
+    return len(kept) <= (1.0 - OCTAGON_MIN_DROP) * len(index)
+
+
+def reduce_vertices(coords, offsets, tolerance=0.0):
+    """Pre-filter vertices before computing bounding geometries.
+
+    With a zero ``tolerance`` only the exact octagon filter runs. A
+    positive ``tolerance`` first snaps vertices to a grid fine enough
+    that none moves further than ``tolerance``, which merges dense
+    vertices, and drops the repeats this leaves along each feature.
+    The result is then the exact result of vertices moved by at most
+    ``tolerance``, so every input vertex lies within ``tolerance`` of it.
+    Repeats that are not next to each other are left to ``convex_hulls``,
+    finding them takes a sort as costly as the hull.
+
+    The octagon filter does not pay off when most vertices are on the
+    hull, e.g. on convex outlines, so a batch is only filtered when a
+    sample of its features loses at least OCTAGON_MIN_DROP of their
+    vertices.
+    """
+    if tolerance > 0 and len(coords):
+        grid = tolerance * np.sqrt(2.0)
+        coords, offsets = _drop_repeats(np.round(coords / grid) * grid, offsets)
+    if not _octagon_pays(coords, offsets):
+        return coords, offsets
+    return octagon_filter(coords, offsets)
+
+
+# ---------------------------------------------------------------------------
+# Convex hulls
+# ---------------------------------------------------------------------------
+
+# Array passes over a hull chain before the features still changing are
+# finished one vertex at a time
+CHAIN_PASSES = 32
+
+
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+
+def _half_chain(points, positions):
+    """One chain of Andrew's monotone chain, as the positions it keeps"""
+    chain = []
+    for position in positions:
+        p = points[position]
+        while len(chain) >= 2 and _cross(points[chain[-2]], points[chain[-1]], p) <= 0:
+            chain.pop()
+        chain.append(position)
+    return chain
+
+
+def _hull_chain(ordered, feature_ids, sign):
+    """Positions on the lower (``sign`` 1) or upper (-1) chain of every feature.
+
+    ``ordered`` is sorted by feature, then x, then y. Every pass drops, in
+    all features at once, each vertex that does not turn left (right for
+    the upper chain) between its current neighbours. Such a vertex lies
+    on or beyond the chord of two other vertices, so it is never a hull
+    vertex, and a chain without any left is the hull chain. Features that
+    still change after CHAIN_PASSES passes are finished with the plain
+    monotone chain on the vertices left.
+    """
+    x, y = ordered[:, 0], ordered[:, 1]
+    alive = np.arange(len(ordered))
+    done = []
+    for _ in range(CHAIN_PASSES):
+        if len(alive) < 3:
+            break
+        f = feature_ids[alive]
+        ax, ay = x[alive], y[alive]
+        cross = ((ax[1:-1] - ax[:-2]) * (ay[2:] - ay[:-2])
+                 - (ay[1:-1] - ay[:-2]) * (ax[2:] - ax[:-2]))
+        drop = np.zeros(len(alive), dtype=bool)
+        drop[1:-1] = (f[:-2] == f[1:-1]) & (f[1:-1] == f[2:]) & (sign * cross <= 0)
+        changing = np.zeros(len(feature_ids), dtype=bool)
+        changing[f[drop]] = True
+        active = changing[f]
+        done.append(alive[~active])
+        alive = alive[active & ~drop]
+    if len(alive):
+        f = feature_ids[alive]
+        bounds = np.flatnonzero(np.diff(f)) + 1
+        points = ordered.tolist()
+        for part in np.split(alive, bounds):
+            part = part.tolist()
+            if sign < 0:
+                part.reverse()
+            done.append(np.array(_half_chain(points, part), dtype=np.int64))
+    return np.concatenate(done) if done else alive
+
+
+def _sort_points(coords, feature_ids):
+    """Order grouping ``coords`` by feature, then by x, then by y
+
+    Same as ``np.lexsort((y, x, feature_ids))``, several times faster: an
+    unstable sort by x and a stable sort of the integer feature ids, with
+    only the runs of equal x sorted again by y.
+    """
+    x = coords[:, 0]
+    order = np.argsort(x)
+    order = order[np.argsort(feature_ids[order], kind='stable')]
+    if len(order) > 1:
+        xs = x[order]
+        fs = feature_ids[order]
+        same = (fs[1:] == fs[:-1]) & (xs[1:] == xs[:-1])
+        if same.any():
+            tie = np.zeros(len(order), dtype=bool)
+            tie[1:] |= same
+            tie[:-1] |= same
+            positions = np.flatnonzero(tie)
+            ties = order[positions]
+            order[positions] = ties[np.lexsort((coords[ties, 1], x[ties], feature_ids[ties]))]
+    return order
+
+
+def convex_hulls(coords, offsets):
+    """Return the convex hull of every feature as (coords, offsets).
+
+    Hull vertices are counter-clockwise and not closed. Degenerate inputs
+    give one or two vertices, empty features give none. Andrew's
+    monotone chain, run on all features of the batch at once, see
+    ``_hull_chain``.
+    """
+    n = len(offsets) - 1
+    feature_ids = np.repeat(np.arange(n), np.diff(offsets))
+    # One sort for the whole batch, grouped by feature then by x, y
+    order = _sort_points(coords, feature_ids)
+    ordered = coords[order]
+    feature_ids = feature_ids[order]
+    # Drop duplicate vertices inside each feature
+    keep = np.ones(len(ordered), dtype=bool)
+    if len(ordered) > 1:
+        keep[1:] = (
+            (feature_ids[1:] != feature_ids[:-1])
+            | (ordered[1:] != ordered[:-1]).any(axis=1)
+        )
+    ordered = ordered[keep]
+    feature_ids = feature_ids[keep]
+    counts = np.bincount(feature_ids, minlength=n)
+    starts = np.concatenate([[0], np.cumsum(counts)])
+
+    # Counter-clockwise: the lower chain without its last vertex, then the
+    # upper chain backwards without its first, or the single vertex
+    lower = _hull_chain(ordered, feature_ids, 1)
+    lower = lower[(lower != starts[feature_ids[lower] + 1] - 1) | (counts[feature_ids[lower]] == 1)]
+    upper = _hull_chain(ordered, feature_ids, -1)
+    upper = upper[upper != starts[feature_ids[upper]]]
+    positions = np.concatenate([lower, upper])
+    # Feature blocks of 2 * count keys, lower chain first, upper reversed
+    lower_ids = feature_ids[lower]
+    upper_ids = feature_ids[upper]
+    rank = np.concatenate([
+        starts[lower_ids] + lower,
+        3 * starts[upper_ids] + 2 * counts[upper_ids] - 1 - upper,
+    ])
+    positions = positions[np.argsort(rank)]
+
+    hull_counts = np.bincount(feature_ids[positions], minlength=n)
+    hull_offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(hull_counts, out=hull_offsets[1:])
+    return ordered[positions], hull_offsets
+
+
+# ---------------------------------------------------------------------------
+# Oriented rectangles (rotating calipers)
+# ---------------------------------------------------------------------------
+
+def _caliper_edges(hull_coords, hull_offsets):
+    """Evaluate every hull edge direction in one batch.
+
+    Rotating calipers: the edge directions of a counter-clockwise hull
+    turn monotonically, so the vertex touched by each of the other three
+    calipers only moves forward from one edge to the next. The caliper
+    positions of all edges come from merging the edge angles with the
+    turned caliper angles, one searchsorted over the whole batch, which
+    keeps memory linear in the number of hull vertices.
+
+    Returns per edge: feature index, unit direction (u), and the min/max
+    projections on u and on its left normal (v).
+    """
+    counts = np.diff(hull_offsets)
+    counts = np.where(counts >= 2, counts, 0)
+    starts = hull_offsets[:-1]
+    edge_feature = np.repeat(np.arange(len(counts)), counts)
+    edge_count = counts[edge_feature]
+    # Position of the first edge of each edge's feature
+    first = np.repeat(np.cumsum(counts) - counts, counts)
+    edge_local = np.arange(len(edge_feature)) - first
+    edge_start = starts[edge_feature] + edge_local
+    edge_end = starts[edge_feature] + (edge_local + 1) % np.maximum(edge_count, 1)
+
+    direction = hull_coords[edge_end] - hull_coords[edge_start]
+    length = np.hypot(direction[:, 0], direction[:, 1])
+    length[length == 0] = 1.0
+    u = direction / length[:, None]
+    v = np.column_stack([-u[:, 1], u[:, 0]])
+
+    # Edge angles relative to the first edge of the hull increase from 0
+    # to 2 pi. Features are 8 > 2 pi apart, so one sorted key covers them
+    angle = np.arctan2(direction[:, 1], direction[:, 0])
+    relative = np.mod(angle - angle[first], _TAU)
+    keys = np.maximum.accumulate(edge_feature * 8.0 + relative)
+
+    def project(vertex, axis):
+        points = hull_coords[vertex]
+        return points[:, 0] * axis[:, 0] + points[:, 1] * axis[:, 1]
+
+    def caliper(turn, axis, reduce):
+        """Extreme projection on ``axis`` of the caliper turned by ``turn``
+
+        Rounding can pick a neighbour of the touched vertex when edges are
+        nearly parallel, so the neighbours and the edge itself are checked
+        too, which also keeps degenerate rectangles from flipping.
+        """
+        local = np.searchsorted(keys, edge_feature * 8.0 + np.mod(relative + turn, _TAU))
+        local -= first
+        size = np.maximum(edge_count, 1)
+        candidates = [project(edge_start, axis), project(edge_end, axis)]
+        for step in (-1, 0, 1):
+            candidates.append(project(starts[edge_feature] + (local + step) % size, axis))
+        return reduce.reduce(candidates, axis=0)
+
+    bounds = np.column_stack([
+        caliper(1.5 * np.pi, u, np.minimum),
+        np.minimum(project(edge_start, v), project(edge_end, v)),
+        caliper(0.5 * np.pi, u, np.maximum),
+        caliper(np.pi, v, np.maximum),
+    ])
+    return edge_feature, u, bounds
+
+
+def _best_edges(hull_coords, hull_offsets):
+    """Return feature indexes with the (u, bounds) of their minimum area edge."""
+    edge_feature, u, bounds = _caliper_edges(hull_coords, hull_offsets)
+    area = (bounds[:, 2] - bounds[:, 0]) * (bounds[:, 3] - bounds[:, 1])
+    # Sort by feature then area, the first edge of each feature wins
+    order = np.lexsort((area, edge_feature))
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = edge_feature[order][1:] != edge_feature[order][:-1]
+    best = order[first]
+    return edge_feature[best], u[best], bounds[best]
+
+
+def _rectangle_rings(u, bounds):
+    """Closed (n, 5, 2) rings of the rectangles described by ``u`` and ``bounds``"""
+    v = np.column_stack([-u[:, 1], u[:, 0]])
+    # Corner columns of bounds: min_u, min_v, max_u, max_v
+    a = bounds[:, [0, 2, 2, 0, 0]]
+    b = bounds[:, [1, 1, 3, 3, 1]]
+    return a[:, :, None] * u[:, None, :] + b[:, :, None] * v[:, None, :]
+
+
+def oriented_rectangles(hull_coords, hull_offsets):
+    """Return (u, bounds) arrays describing the minimum area rectangles.
+
+    ``u`` is the unit direction of the rectangle's first side and
+    ``bounds`` holds min_u, min_v, max_u, max_v in the rotated frame.
+    Features with fewer than two hull vertices get NaN rows.
+    """
+    counts = np.diff(hull_offsets)
+    n = len(counts)
+    u = np.full((n, 2), np.nan)
+    bounds = np.full((n, 4), np.nan)
+
+    if counts.max(initial=0) >= 2:
+        features, best_u, best_bounds = _best_edges(hull_coords, hull_offsets)
+        u[features] = best_u
+        bounds[features] = best_bounds
+    return u, bounds
+
+
+# ---------------------------------------------------------------------------
+# Minimum enclosing circles (Welzl)
+# ---------------------------------------------------------------------------
+
+def _circle_two(a, b):
+    cx = (a[0] + b[0]) / 2.0
+    cy = (a[1] + b[1]) / 2.0
+    return cx, cy, ((a[0] - cx) ** 2 + (a[1] - cy) ** 2) ** 0.5
+
+
+def _circle_three(a, b, c):
+    d = 2.0 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    if d == 0:
+        # Collinear, the widest pair defines the circle
+        return max(
+            (_circle_two(a, b), _circle_two(a, c), _circle_two(b, c)),
+            key=lambda circle: circle[2]
+        )
+    a2 = a[0] ** 2 + a[1] ** 2
+    b2 = b[0] ** 2 + b[1] ** 2
+    c2 = c[0] ** 2 + c[1] ** 2
+    cx = (a2 * (b[1] - c[1]) + b2 * (c[1] - a[1]) + c2 * (a[1] - b[1])) / d
+    cy = (a2 * (c[0] - b[0]) + b2 * (a[0] - c[0]) + c2 * (b[0] - a[0])) / d
+    return cx, cy, ((a[0] - cx) ** 2 + (a[1] - cy) ** 2) ** 0.5
+
+
+def _inside(circle, p):
+    cx, cy, r = circle
+    return (p[0] - cx) ** 2 + (p[1] - cy) ** 2 <= (r * (1 + 1e-12) + 1e-12) ** 2
+
+
+def welzl(points, seed=0):
+    """Minimum enclosing circle of a list of points as (cx, cy, r).
+
+    Iterative randomized Welzl, expected linear time. The shuffle uses a
+    fixed seed so repeated runs give identical output.
+    """
+    points = list(points)
+    random.Random(seed).shuffle(points)
+    circle = (points[0][0], points[0][1], 0.0)
+    for i, p in enumerate(points):
+        if _inside(circle, p):
+            continue
+        circle = (p[0], p[1], 0.0)
+        for j in range(i):
+            q = points[j]
+            if _inside(circle, q):
+                continue
+            circle = _circle_two(p, q)
+            for k in range(j):
+                if not _inside(circle, points[k]):
+                    circle = _circle_three(p, q, points[k])
+    return circle
+
+
+def _inside_many(cx, cy, r, px, py):
+    return (px - cx) ** 2 + (py - cy) ** 2 <= (r * (1 + 1e-12) + 1e-12) ** 2
+
+
+def _circles_two(ax, ay, bx, by):
+    cx = (ax + bx) / 2.0
+    cy = (ay + by) / 2.0
+    return cx, cy, np.hypot(ax - cx, ay - cy)
+
+
+def _circles_three(ax, ay, bx, by, qx, qy):
+    """``_circle_three`` for arrays of point triples"""
+    d = 2.0 * (ax * (by - qy) + bx * (qy - ay) + qx * (ay - by))
+    a2 = ax ** 2 + ay ** 2
+    b2 = bx ** 2 + by ** 2
+    q2 = qx ** 2 + qy ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cx = (a2 * (by - qy) + b2 * (qy - ay) + q2 * (ay - by)) / d
+        cy = (a2 * (qx - bx) + b2 * (ax - qx) + q2 * (bx - ax)) / d
+    r = np.hypot(ax - cx, ay - cy)
+    collinear = np.flatnonzero(d == 0)
+    if len(collinear):
+        # The widest pair defines the circle
+        pairs = [
+            _circles_two(ax[collinear], ay[collinear], bx[collinear], by[collinear]),
+            _circles_two(ax[collinear], ay[collinear], qx[collinear], qy[collinear]),
+            _circles_two(bx[collinear], by[collinear], qx[collinear], qy[collinear]),
+        ]
+        widest = np.argmax([pair[2] for pair in pairs], axis=0)
+        rows = np.arange(len(collinear))
+        cx[collinear], cy[collinear], r[collinear] = (
+            np.array([pair[k] for pair in pairs])[widest, rows] for k in range(3)
+        )
+    return cx, cy, r
+
+
+def _lockstep_welzl(px, py, counts):
+    """Welzl's iteration run on many small point sets at once
+
+    ``px`` and ``py`` are (m, h) arrays, row i holding ``counts[i]``
+    points. Every step of the iteration is one array operation over the
+    rows that need it, so the Python overhead grows with h, not with m.
+    """
+    cx = px[:, 0].copy()
+    cy = py[:, 0].copy()
+    r = np.zeros(len(counts))
+    for i in range(1, px.shape[1]):
+        s = np.flatnonzero(counts > i)
+        s = s[~_inside_many(cx[s], cy[s], r[s], px[s, i], py[s, i])]
+        if not len(s):
+            continue
+        cx[s], cy[s], r[s] = px[s, i], py[s, i], 0.0
+        for j in range(i):
+            t = s[~_inside_many(cx[s], cy[s], r[s], px[s, j], py[s, j])]
+            if not len(t):
+                continue
+            cx[t], cy[t], r[t] = _circles_two(px[t, i], py[t, i], px[t, j], py[t, j])
+            for k in range(j):
+                u = t[~_inside_many(cx[t], cy[t], r[t], px[t, k], py[t, k])]
+                if len(u):
+                    cx[u], cy[u], r[u] = _circles_three(
+                        px[u, i], py[u, i], px[u, j], py[u, j], px[u, k], py[u, k]
+                    )
+    return cx, cy, r
+
+
+def enclosing_circles(hull_coords, hull_offsets):
+    """Return an (n, 3) array of center x, center y, radius per feature.
+
+    Hulls of up to LOCKSTEP_VERTICES vertices are solved together by
+    ``_lockstep_welzl``, in buckets of similar size, larger ones one at a
+    time by ``welzl``. Both visit the vertices in a fixed scrambled order.
+    """
+    n = len(hull_offsets) - 1
+    circles = np.full((n, 3), np.nan)
+    counts = np.diff(hull_offsets)
+
+    large = np.flatnonzero(counts > LOCKSTEP_VERTICES)
+    if len(large):
+        points = hull_coords.tolist()
+        for i in large:
+            circles[i] = welzl(points[hull_offsets[i]:hull_offsets[i + 1]])
+
+    low, high = 0, 1
+    while low < LOCKSTEP_VERTICES:
+        rows = np.flatnonzero((counts > low) & (counts <= high))
+        low, high = high, 2 * high
+        if not len(rows):
+            continue
+        row_counts = counts[rows, None]
+        local = np.arange(row_counts.max())
+        # Scrambled visiting order, padding sorted last
+        keys = np.where(local < row_counts, (local * 2654435761) % 4294967291, np.inf)
+        index = hull_offsets[rows, None] + np.argsort(keys, axis=1)
+        index = np.minimum(index, hull_offsets[rows + 1, None] - 1)
+        circles[rows] = np.column_stack(_lockstep_welzl(
+            hull_coords[index, 0], hull_coords[index, 1], counts[rows]
+        ))
+    return circles
+
+
+def _circle_rings(circles, segments=CIRCLE_SEGMENTS):
+    """Closed (n, segments + 1, 2) rings of (cx, cy, r) circles"""
+    angles = np.linspace(0.0, 2.0 * np.pi, segments + 1)
+    cx, cy, r = circles[:, 0, None], circles[:, 1, None], circles[:, 2, None]
+    rings = np.stack([cx + r * np.cos(angles), cy + r * np.sin(angles)], axis=2)
+    rings[:, -1] = rings[:, 0]
+    return rings
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+def _close(ring):
+    return np.vstack([ring, ring[:1]])
+
+
+def _closed_rings(coords, offsets):
+    """Every feature as a closed ring, None when empty, as views of one array"""
+    counts = np.diff(offsets)
+    present = counts > 0
+    closed_offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts + present, out=closed_offsets[1:])
+    index = np.arange(closed_offsets[-1]) - np.repeat(
+        closed_offsets[:-1] - offsets[:-1], counts + present
+    )
+    # The closing vertex repeats the first one
+    index[closed_offsets[1:][present] - 1] = offsets[:-1][present]
+    closed = coords[index]
+    return [
+        closed[start:end] if end > start else None
+        for start, end in zip(closed_offsets[:-1].tolist(), closed_offsets[1:].tolist())
+    ]
+
+
+def _envelope_rings(coords, offsets, rings):
+    for i, (min_x, min_y, max_x, max_y) in enumerate(envelopes(coords, offsets)):
+        if not np.isnan(min_x):
+            rings[i] = np.array([
+                (min_x, min_y), (max_x, min_y), (max_x, max_y),
+                (min_x, max_y), (min_x, min_y)
+            ], dtype=_COORD_DTYPE)
+
+
+def _area_perimeter(ring):
+    """Shoelace area and length of a closed ring"""
+    x, y = ring[:, 0], ring[:, 1]
+    area = 0.5 * abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+    return area, np.hypot(np.diff(x), np.diff(y)).sum()
+
+
+def _measure(rings, hull_coords, hull_offsets, u, bounds):
+    """Measurement rows for ``bounding_rings``, from hulls already computed"""
+    measurements = np.full((len(rings), len(MEASUREMENTS)), np.nan)
+    counts = np.diff(hull_offsets)
+    for i in np.flatnonzero(counts):
+        area, perimeter = _area_perimeter(rings[i])
+        if counts[i] == 1:
+            width = height = angle = 0.0
+            hull_area = 0.0
+        else:
+            size_u = bounds[i, 2] - bounds[i, 0]
+            size_v = bounds[i, 3] - bounds[i, 1]
+            # Width is the long side, its direction gives the angle
+            side = u[i] if size_u >= size_v else np.array([-u[i, 1], u[i, 0]])
+            width, height = max(size_u, size_v), min(size_u, size_v)
+            angle = np.degrees(np.arctan2(side[0], side[1])) % 180.0
+            hull_area = _area_perimeter(
+                _close(hull_coords[hull_offsets[i]:hull_offsets[i + 1]])
+            )[0]
+        fill_ratio = hull_area / area if area > 0 else np.nan
+        measurements[i] = (width, height, angle, area, perimeter, fill_ratio)
+    return measurements
+
+
+def bounding_rings(coords, offsets, geometry_type, segments=CIRCLE_SEGMENTS,
+                   measure=False, tolerance=None):
+    """Compute the bounding geometry of every feature as a closed ring.
+
+    ``geometry_type`` is one of ENVELOPE, ORIENTED_RECTANGLE, CIRCLE or
+    CONVEX_HULL. Returns a list with one (k, 2) ring per feature, or None
+    for features without vertices.
+
+    With ``measure`` a second (n, 6) array is returned, with the columns
+    of MEASUREMENTS. Width, height and angle describe the minimum oriented
+    rectangle: width is its longer side and angle the azimuth of that side,
+    clockwise from north in [0, 180). Area and perimeter are those of the
+    ring, and fill_ratio is the convex hull area over the ring area. Every
+    value is derived from a single convex hull per feature.
+
+    A ``tolerance`` other than None pre-filters the vertices with
+    ``reduce_vertices`` before the hulls are computed.
+    """
+    n = len(offsets) - 1
+    rings = [None] * n
+
+    if geometry_type == ENVELOPE and not measure:
+        _envelope_rings(coords, offsets, rings)
+        return rings
+
+    if geometry_type not in (ENVELOPE, ORIENTED_RECTANGLE, CIRCLE, CONVEX_HULL):
+        raise ValueError(f"Unknown geometry type: {geometry_type}")
+
+    if tolerance is not None:
+        coords, offsets = reduce_vertices(coords, offsets, tolerance)
+    hull_coords, hull_offsets = convex_hulls(coords, offsets)
+    counts = np.diff(hull_offsets)
+    u = bounds = None
+    if geometry_type == ORIENTED_RECTANGLE or measure:
+        u, bounds = oriented_rectangles(hull_coords, hull_offsets)
+
+    if geometry_type == ENVELOPE:
+        # The hull keeps the extreme vertices, so its envelope is the same
+        _envelope_rings(hull_coords, hull_offsets, rings)
+    elif geometry_type == CONVEX_HULL:
+        rings = _closed_rings(hull_coords, hull_offsets)
+    elif geometry_type == ORIENTED_RECTANGLE:
+        rectangles = _rectangle_rings(u, bounds)
+        for i in np.flatnonzero(counts):
+            if counts[i] == 1:
+                rings[i] = _close(np.repeat(hull_coords[hull_offsets[i]:hull_offsets[i + 1]], 4, axis=0))
+            else:
+                rings[i] = rectangles[i]
+    else:
+        circles = _circle_rings(enclosing_circles(hull_coords, hull_offsets), segments)
+        for i in np.flatnonzero(counts):
+            rings[i] = circles[i]
+
+    if measure:
+        return rings, _measure(rings, hull_coords, hull_offsets, u, bounds)
+    return rings
+
+
+def bounding_wkbs(wkbs, geometry_type, segments=CIRCLE_SEGMENTS, measure=False,
+                  tolerance=None):
+    """Compute bounding geometries straight from WKB to Polygon WKB.
+
+    Returns one WKB bytes object per input, or None for empty inputs.
+    With ``measure`` the measurement array of ``bounding_rings`` is
+    returned as well.
+    """
+    coords, offsets = pack_wkb(wkbs)
+    if measure:
+        rings, measurements = bounding_rings(
+            coords, offsets, geometry_type, segments, True, tolerance
+        )
+    else:
+        rings = bounding_rings(coords, offsets, geometry_type, segments, tolerance=tolerance)
+    result = [None if ring is None else polygon_wkb(ring) for ring in rings]
+    if measure:
+        return result, measurements
+    return result
@@ -0,0 +1,191 @@
+"""
+Incremental updates of an existing output layer.
+
+Outputs created with source tracking carry the source feature id (or the
+group value for grouped runs) and a hash of the geometry and attributes
+the job reads. An update hashes the current source, and only recomputes
+the features or groups whose hash changed, appeared or disappeared.
+"""
+from qgis.core import (
+    NULL, QgsApplication, QgsExpression, QgsFeature, QgsFeatureRequest, QgsProject,
+    QgsVectorLayerFeatureSource
+)
+from qgis.PyQt.QtCore import QObject
+
+from .bounding_task import BoundingBoxUpdateTask
+from .processor import SOURCE_FID_FIELD, SOURCE_HASH_FIELD
+
+
+class MappedSink:
+    """Writes features built on ``fields`` to a sink with another layout
+
+    Attributes are matched by name, so provider columns such as the
+    GeoPackage fid are left NULL for the provider to fill.
+    """
+
+    def __init__(self, sink, fields, sink_fields):
+        self.sink = sink
+        self.sink_fields = sink_fields
+        self.indexes = [fields.lookupField(name) for name in sink_fields.names()]
+
+    def addFeatures(self, features, flags=0):
+        mapped = []
+        for feature in features:
+            attributes = feature.attributes()
+            new_feature = QgsFeature(self.sink_fields)
+            new_feature.setGeometry(feature.geometry())
+            new_feature.setAttributes([
+                attributes[index] if index >= 0 else NULL for index in self.indexes
+            ])
+            mapped.append(new_feature)
+        return self.sink.addFeatures(mapped, flags)
+
+    def lastError(self):
+        return self.sink.lastError()
+
+
+class IncrementalUpdater:
+    """Brings a tracked output layer up to date with its source layer
+
+    Construct on the main thread, ``update`` can then run in a task.
+    Each updater works on its own copy of ``processor``.
+    """
+
+    def __init__(self, processor, layer, output_layer):
+        if processor.group_levels:
+            raise ValueError("Incremental updates only support grouping by a single field")
+        processor = processor.copy()
+        processor.track_source = True
+        self.processor = processor
+        self.layer = layer
+        self.output_layer = output_layer
+        self.key_field = processor.group_field or SOURCE_FID_FIELD
+
+        self.fields = processor.output_fields(layer.fields())
+        # Provider keys such as the GeoPackage fid are not output fields
+        keys = set(output_layer.dataProvider().pkAttributeIndexes())
+        names = [
+            field.name() for index, field in enumerate(output_layer.fields())
+            if index not in keys
+        ]
+        if names != self.fields.names():
+            raise ValueError(
+                "The output layer does not match these options or was created "
+                "without incremental tracking"
+            )
+
+        processor.set_transform(layer.crs(), QgsProject.instance().transformContext())
+        self.source = QgsVectorLayerFeatureSource(layer)
+        self.source_fields = layer.fields()
+        self.output_source = QgsVectorLayerFeatureSource(output_layer)
+        self.output_fields = output_layer.fields()
+        self.added = 0
+        self.changed = 0
+        self.deleted = 0
+
+    def stored_state(self):
+        """Output feature id and stored hash, by source key"""
+        request = QgsFeatureRequest()
+        request.setFlags(QgsFeatureRequest.NoGeometry)
+        request.setSubsetOfAttributes(
+            [self.key_field, SOURCE_HASH_FIELD], self.output_fields
+        )
+        return {
+            feature[self.key_field]: (feature.id(), feature[SOURCE_HASH_FIELD])
+            for feature in self.output_source.getFeatures(request)
+        }
+
+    def group_filter(self, keys):
+        """Expression matching the source features of the given groups"""
+        column = QgsExpression.quotedColumnRef(self.processor.group_field)
+        values = [key for key in keys if key is not None and key != NULL]
+        clauses = []
+        if values:
+            clauses.append('{} IN ({})'.format(
+                column, ', '.join(QgsExpression.quotedValue(value) for value in values)
+            ))
+        if len(values) < len(keys):
+            clauses.append(f'{column} IS NULL')
+        return ' OR '.join(clauses)
+
+    def update(self, feedback):
+        """Recompute outdated outputs, returns False when canceled"""
+        self.processor.source_fields = self.source_fields
+        stored = self.stored_state()
+        current = self.processor.source_state(self.source)
+        if feedback.isCanceled():
+            return False
+
+        outdated = [
+            key for key, value in current.items()
+            if key not in stored or stored[key][1] != value
+        ]
+        removed = [key for key in stored if key not in current]
+
+        self.added = sum(1 for key in outdated if key not in stored)
+        self.changed = len(outdated) - self.added
+        self.deleted = len(removed)
+
+        provider = self.output_layer.dataProvider()
+        stale = [stored[key][0] for key in outdated + removed if key in stored]
+        if stale and not provider.deleteFeatures(stale):
+            raise IOError("Could not delete outdated output features")
+
+        if not outdated:
+            return True
+
+        request = QgsFeatureRequest()
+        if self.processor.group_field:
+            request.setFilterExpression(self.group_filter(outdated))
+        else:
+            request.setFilterFids(outdated)
+
+        return self.processor.process(
+            self.source, self.source_fields,
+            MappedSink(provider, self.fields, self.output_fields), self.fields,
+            feedback, len(outdated), request=request
+        )
+
+
+class EditFollower(QObject):
+    """Runs an incremental update each time edits of the source are saved"""
+
+    def __init__(self, iface, processor, layer, output_layer):
+        super().__init__()
+        self.iface = iface
+        self.processor = processor
+        self.layer = layer
+        self.output_layer = output_layer
+        self.task = None
+        self.pending = False
+        layer.afterCommitChanges.connect(self.schedule)
+
+    def schedule(self):
+        if self.task is not None:
+            # Catch up once the running update is done
+            self.pending = True
+            return
+
+        try:
+            updater = IncrementalUpdater(self.processor, self.layer, self.output_layer)
+        except (RuntimeError, ValueError):
+            # The output layer was removed or changed, stop following
+            self.stop()
+            return
+
+        self.task = BoundingBoxUpdateTask(self.iface, updater, quiet=True)
+        self.task.taskCompleted.connect(self.task_done)
+        self.task.taskTerminated.connect(self.task_done)
+        QgsApplication.taskManager().addTask(self.task)
+
+    def task_done(self):
+        self.task = None
+        if self.pending:
+            self.pending = False
+            self.schedule()
+
+    def stop(self):
+        try:
+            self.layer.afterCommitChanges.disconnect(self.schedule)
+        except (RuntimeError, TypeError):
+            pass
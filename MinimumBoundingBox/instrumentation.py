@@ -0,0 +1,89 @@
+"""
+Phase timers and counters for a bounding box run.
+
+Hot loops call ``split(name)``, which charges the time since the previous
+split to ``name`` with a single perf_counter call, so instrumenting every
+feature stays cheap.
+"""
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+
+PHASES = (
+    'iteration', 'grouping', 'geometry', 'reprojection', 'attributes', 'writing',
+    'loading'
+)
+
+
+class RunStats:
+    def __init__(self, profile=False):
+        self.times = dict.fromkeys(PHASES, 0.0)
+        self.counters = {}
+        self.started = None
+        self.wall = 0.0
+        self.last = time.perf_counter()
+        self.profiler = cProfile.Profile() if profile else None
+
+    def start(self):
+        """Start the wall clock, and the profiler in the calling thread"""
+        self.started = time.perf_counter()
+        self.last = self.started
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.started is not None:
+            self.wall += time.perf_counter() - self.started
+            self.started = None
+
+    def split(self, name=None):
+        """Charge the time since the previous split to ``name``
+
+        Without a name the time is dropped, which marks a phase start.
+        """
+        now = time.perf_counter()
+        if name is not None:
+            self.times[name] = self.times.get(name, 0.0) + now - self.last
+        self.last = now
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+            self.last = time.perf_counter()
+
+    def count(self, name, value=1):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self):
+        return {
+            'wall_seconds': self.wall,
+            'phases': dict(self.times),
+            'counters': dict(self.counters),
+        }
+
+    def summary(self):
+        lines = [f"Total: {self.wall:.3f} s"]
+        for name, seconds in self.times.items():
+            share = 100.0 * seconds / self.wall if self.wall else 0.0
+            lines.append(f"  {name:<12}{seconds:10.3f} s {share:5.1f}%")
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"  {name:<24}{value:>10}")
+        return '\n'.join(lines)
+
+    def write_json(self, path, **extra):
+        report = self.as_dict()
+        report.update(extra)
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+
+    def write_profile(self, path):
+        """Dump cProfile stats, readable with pstats or snakeviz"""
+        if self.profiler is not None:
+            self.profiler.dump_stats(path)
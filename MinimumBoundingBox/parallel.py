@@ -0,0 +1,112 @@
+"""
+Process pool for the per-feature bounding geometries.
+
+Chunks of WKB geometries are sent to worker processes running the
+vectorized engine, and results are handed back in submission order so
+output features line up with the input. This module must not import
+QGIS, workers are plain Python interpreters.
+"""
+import os
+import site
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import spawn
+
+from . import geometry_engine
+
+
+# multiprocessing keeps the spawn executable in a module global, pools
+# take turns swapping it while their workers start
+_executable_lock = threading.Lock()
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def python_executable():
+    """Python interpreter for worker processes
+
+    Inside QGIS sys.executable is the QGIS binary, so look for the
+    interpreter shipped next to the embedded Python.
+    """
+    if os.path.basename(sys.executable).lower().startswith('python'):
+        return sys.executable
+    names = ('pythonw.exe', 'python.exe') if os.name == 'nt' else ('python3', 'python')
+    for folder in (sys.exec_prefix, os.path.join(sys.exec_prefix, 'bin')):
+        for name in names:
+            candidate = os.path.join(folder, name)
+            if os.path.isfile(candidate):
+                return candidate
+    return sys.executable
+
+
+def compute_chunk(wkbs, geometry_type, measure=False, tolerance=None):
+    return geometry_engine.bounding_wkbs(
+        wkbs, geometry_type, measure=measure, tolerance=tolerance
+    )
+
+
+class BoundingPool:
+    """Ordered process pool, used as a context manager
+
+    At most ``2 * workers`` chunks are in flight so memory stays bounded
+    while reading the layer.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or default_workers()
+        self.executor = None
+
+    def __enter__(self):
+        # Workers have to import this package from the plugin folder, the
+        # initializer is from the standard library so it unpickles before
+        plugins_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=site.addsitedir,
+            initargs=(plugins_dir,)
+        )
+        try:
+            with _executable_lock:
+                previous = spawn.get_executable()
+                spawn.set_executable(python_executable())
+                try:
+                    # A spawning executor starts all its workers on the
+                    # first submit, so they are running when this returns
+                    executor.submit(int)
+                finally:
+                    spawn.set_executable(previous)
+        except BaseException:
+            executor.shutdown(cancel_futures=True)
+            raise
+        self.executor = executor
+        return self
+
+    def __exit__(self, *exc_info):
+        self.executor.shutdown(cancel_futures=True)
+        self.executor = None
+        return False
+
+    def map(self, chunks, geometry_type, measure=False, tolerance=None):
+        """Yield (context, result) for each (context, WKBs) chunk, in order
+
+        The result is what ``geometry_engine.bounding_wkbs`` returns.
+        """
+        pending = deque()
+        for context, wkbs in chunks:
+            pending.append(
+                (context, self.executor.submit(
+                    compute_chunk, wkbs, geometry_type, measure, tolerance
+                ))
+            )
+            if len(pending) >= 2 * self.workers:
+                context, future = pending.popleft()
+                yield context, future.result()
+        while pending:
+            context, future = pending.popleft()
+            yield context, future.result()
@@ -0,0 +1,20 @@
+import os.path
+
+from qgis.core import QgsProcessingProvider
+from qgis.PyQt.QtGui import QIcon
+
+from .bounding_box_algorithm import MinimumBoundingBoxAlgorithm
+
+
+class MinimumBoundingBoxProvider(QgsProcessingProvider):
+    def id(self):
+        return 'minimumboundingbox'
+
+    def name(self):
+        return 'Minimum Bounding Box'
+
+    def icon(self):
+        return QIcon(os.path.join(os.path.dirname(__file__), 'Icon.png'))
+
+    def loadAlgorithms(self):
+        self.addAlgorithm(MinimumBoundingBoxAlgorithm())
@@ -0,0 +1,824 @@
+from qgis.core import (
+    QgsFeature, QgsField, QgsFields, QgsGeometry, QgsWkbTypes,
+    QgsRectangle, QgsFeatureRequest, QgsExpression, QgsExpressionContext,
+    QgsExpressionContextUtils
+)
+from qgis.PyQt.QtCore import QVariant
+import hashlib
+import math
+
+from . import pushdown
+from .buffered_sink import BufferedSink, DEFAULT_BATCH_SIZE
+from .defaults import DEFAULT_CHUNK_SIZE
+from .instrumentation import RunStats
+from .reproject import BulkTransform
+
+try:
+    from . import geometry_engine
+    from .aggregation import GroupAggregator
+    from .spill import SpillFile, plain_key
+    from .parallel import BoundingPool
+except ImportError:  # NumPy is not available
+    geometry_engine = None
+
+# Number of progress updates over a whole run
+PROGRESS_STEPS = 100
+
+# Output fields used to track source features for incremental updates
+SOURCE_FID_FIELD = 'src_fid'
+SOURCE_HASH_FIELD = 'src_hash'
+HASH_MASK = (1 << 64) - 1
+
+# Optional measurement fields, in the order of geometry_engine.MEASUREMENTS
+MEASUREMENT_FIELDS = ('width', 'height', 'angle', 'area', 'perimeter', 'fill_ratio')
+
+
+class BoundingGeometryProcessor:
+    """Computes bounding geometries from a feature source into a sink
+
+    Progress and cancellation go through ``feedback``, which can be a
+    QgsTask or a QgsFeedback, so the processor never touches the GUI.
+
+    ``group_levels`` groups by several fields or expressions, coarsest
+    first, and ``rollup`` also writes every coarser level, computed from
+    the finer groups in the same pass. A ``group_field`` is then used as
+    the first level.
+
+    With a ``memory_limit`` in MB, grouped partials are spilled to
+    temporary files whenever the running state grows past it, and merged
+    one partition at a time at the end.
+
+    A ``tolerance`` other than None drops vertices that can't change the
+    result before the vectorized kernels run, see
+    ``geometry_engine.reduce_vertices``.
+
+    With a ``target_crs``, outputs are computed in that CRS, see
+    ``reproject``. ``set_transform`` has to be called from the main thread
+    before processing.
+    """
+
+    def __init__(self, geometry_type, group_field=None, selected_fields=None,
+                 use_union=False, workers=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                 batch_size=DEFAULT_BATCH_SIZE, track_source=False, measure=False,
+                 group_levels=None, rollup=False, memory_limit=0, tolerance=None,
+                 target_crs=None):
+        self.group_levels = list(group_levels or [])
+        if self.group_levels and group_field:
+            if group_field not in self.group_levels:
+                self.group_levels.insert(0, group_field)
+            group_field = None
+        if self.group_levels and track_source:
+            raise ValueError("Incremental updates only support grouping by a single field")
+        self.geometry_type = geometry_type
+        self.group_field = group_field
+        self.rollup = rollup and len(self.group_levels) > 1
+        self.selected_fields = selected_fields or []
+        self.use_union = use_union
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.track_source = track_source
+        self.measure = measure
+        # Megabytes of group state kept in memory before spilling, 0 for no limit
+        self.memory_limit = memory_limit
+        # Vertex pre-filter: None off, 0 exact, above 0 approximate
+        self.tolerance = tolerance
+        self.target_crs = target_crs if target_crs is not None and target_crs.isValid() else None
+        self.transformer = None
+        # The NumPy kernels, or one QGIS geometry call per feature or group
+        # as benchmarks/bench_bounding_box.py measures for a baseline
+        self.vectorized = geometry_engine is not None
+        self.feedback = None
+        self.source_fields = None
+        self.request = None
+        self.stats = RunStats()
+        self.report_step = 1
+        self.next_report = 0
+
+    def copy(self):
+        """A processor with the same options and no run state
+
+        A processor keeps the stats, feedback and request of its run, so
+        tasks that may run at the same time each need their own.
+        """
+        processor = BoundingGeometryProcessor(
+            self.geometry_type, self.group_field, self.selected_fields,
+            self.use_union, self.workers, self.chunk_size, self.batch_size,
+            self.track_source, self.measure, self.group_levels, self.rollup,
+            self.memory_limit, self.tolerance, self.target_crs
+        )
+        processor.vectorized = self.vectorized
+        return processor
+
+    def set_transform(self, source_crs, transform_context):
+        """Prepare the transform from ``source_crs`` to the target CRS"""
+        self.transformer = None
+        if self.target_crs is not None and self.target_crs != source_crs:
+            self.transformer = BulkTransform(source_crs, self.target_crs, transform_context)
+
+    def output_crs(self, source_crs):
+        return self.target_crs if self.target_crs is not None else source_crs
+
+    def output_fields(self, source_fields):
+        fields = QgsFields()
+
+        # Add extent fields
+        fields.append(QgsField("min_x", QVariant.Double))
+        fields.append(QgsField("min_y", QVariant.Double))
+        fields.append(QgsField("max_x", QVariant.Double))
+        fields.append(QgsField("max_y", QVariant.Double))
+        fields.append(QgsField("extent", QVariant.String))
+
+        # Add measurement fields
+        if self.measure:
+            for name in MEASUREMENT_FIELDS:
+                fields.append(QgsField(name, QVariant.Double))
+
+        # Add the level and one field per group level
+        if self.group_levels:
+            if self.rollup:
+                fields.append(QgsField("level", QVariant.Int))
+            for i, level in enumerate(self.group_levels):
+                index = source_fields.lookupField(level)
+                if index >= 0:
+                    field = source_fields.at(index)
+                    fields.append(QgsField(field.name(), field.type()))
+                else:
+                    fields.append(QgsField(f"group_{i + 1}", QVariant.String))
+
+        # Add group field if grouping is enabled
+        if self.group_field:
+            group_field_def = source_fields.field(self.group_field)
+            fields.append(QgsField(self.group_field, group_field_def.type()))
+
+        # Add selected attribute fields
+        for field_name in self.selected_fields:
+            field = source_fields.field(field_name)
+            fields.append(QgsField(field_name, field.type()))
+
+        # Add source tracking fields for incremental updates
+        if self.track_source:
+            if not self.group_field:
+                fields.append(QgsField(SOURCE_FID_FIELD, QVariant.LongLong))
+            fields.append(QgsField(SOURCE_HASH_FIELD, QVariant.String))
+
+        return fields
+
+    def feature_hash(self, feature):
+        """64 bit hash of a feature geometry and the attributes the job reads"""
+        digest = hashlib.blake2b(digest_size=8)
+        if feature.hasGeometry():
+            digest.update(bytes(feature.geometry().asWkb()))
+        values = [feature[field] for field in self.selected_fields]
+        if self.group_field:
+            values.append(feature[self.group_field])
+        digest.update(repr(values).encode('utf-8'))
+        return int.from_bytes(digest.digest(), 'little')
+
+    def tracking_values(self, feature):
+        """Source id and hash attributes of an ungrouped output feature"""
+        if not self.track_source:
+            return []
+        return [feature.id(), '{:016x}'.format(self.feature_hash(feature))]
+
+    def source_state(self, source):
+        """Current source hashes, by feature id or by group value for grouped runs
+
+        Group hashes are an order independent sum of their members' hashes.
+        Features and groups without a geometry have no output, so they are
+        left out.
+        """
+        state = {}
+        located = set()
+        request = self.feature_request(self.source_fields)
+        for feature in source.getFeatures(request):
+            has_geometry = feature.hasGeometry() and not feature.geometry().isEmpty()
+            if self.group_field:
+                key = feature[self.group_field]
+                state[key] = (state.get(key, 0) + self.feature_hash(feature)) & HASH_MASK
+                if has_geometry:
+                    located.add(key)
+            elif has_geometry:
+                state[feature.id()] = self.feature_hash(feature)
+        return {
+            key: '{:016x}'.format(value) for key, value in state.items()
+            if not self.group_field or key in located
+        }
+
+    def report(self, current):
+        """Throttled progress update, returns False once canceled"""
+        if current >= self.next_report:
+            self.feedback.setProgress(100.0 * current / self.feature_count)
+            self.next_report = current + self.report_step
+        return not self.feedback.isCanceled()
+
+    def feature_request(self, source_fields, request=None):
+        """Request fetching only the group field and the selected fields
+
+        ``request`` can carry an extra filter, e.g. feature ids.
+        """
+        attributes = list(self.selected_fields)
+        if self.group_field and self.group_field not in attributes:
+            attributes.insert(0, self.group_field)
+        for level in self.group_levels:
+            if source_fields.lookupField(level) >= 0:
+                attributes.append(level)
+            else:
+                attributes.extend(QgsExpression(level).referencedColumns())
+        request = QgsFeatureRequest(request) if request else QgsFeatureRequest()
+        if QgsFeatureRequest.ALL_ATTRIBUTES not in attributes:
+            request.setSubsetOfAttributes(attributes, source_fields)
+        return request
+
+    def level_getters(self, source_fields):
+        """One callable per group level, returning the key part of a feature"""
+        context = QgsExpressionContext()
+        context.appendScope(QgsExpressionContextUtils.globalScope())
+        context.setFields(source_fields)
+
+        getters = []
+        for level in self.group_levels:
+            index = source_fields.lookupField(level)
+            if index >= 0:
+                getters.append(lambda feature, index=index: feature.attribute(index))
+                continue
+
+            expression = QgsExpression(level)
+            if expression.hasParserError():
+                raise ValueError(
+                    f"Invalid group expression {level}: {expression.parserErrorString()}"
+                )
+            expression.prepare(context)
+
+            def evaluate(feature, expression=expression):
+                context.setFeature(feature)
+                return expression.evaluate(context)
+            getters.append(evaluate)
+        return getters
+
+    def level_values(self, level, key):
+        """Level number and key fields of an output feature, NULL past ``level``"""
+        values = [level] if self.rollup else []
+        return values + list(key) + [None] * (len(self.group_levels) - level)
+
+    def process(self, source, source_fields, sink, fields, feedback,
+                feature_count=0, layer_source=None, request=None, stats=None):
+        """Write the bounding geometries of ``source`` features to ``sink``
+
+        ``layer_source``, a pushdown.LayerSource captured on the main thread,
+        is only needed to push grouped work down to a database.
+        ``request`` optionally limits the features processed. Phase timings
+        and counters are collected in ``stats``, a RunStats.
+        Returns False when canceled.
+        """
+        self.source_fields = source_fields
+        self.request = self.feature_request(source_fields, request)
+        self.stats = stats or RunStats()
+        self.stats.start()
+        try:
+            sink = BufferedSink(sink, self.batch_size)
+            if not self.process_into(
+                source, sink, fields, feedback, feature_count, layer_source
+            ):
+                return False
+            with self.stats.phase('writing'):
+                sink.flush()
+            return True
+        finally:
+            self.stats.stop()
+
+    def process_into(self, source, sink, fields, feedback, feature_count, layer_source):
+        self.feedback = feedback
+        self.feature_count = max(feature_count, 1)
+        self.report_step = max(1, feature_count // PROGRESS_STEPS)
+        self.next_report = 0
+
+        stats = self.stats
+        geometry_type = self.geometry_type
+        group_field = self.group_field
+        selected_fields = self.selected_fields
+        use_union = self.use_union
+
+        if self.group_levels:
+            return self.process_levels(source, sink, fields, feedback)
+
+        pushed = None
+        if (group_field and layer_source is not None and not use_union
+                and not self.track_source and not self.measure
+                and self.transformer is None):
+            # Let the database aggregate the groups when it can
+            with stats.phase('geometry'):
+                pushed = pushdown.grouped_bounding_geometries(
+                    layer_source, group_field, geometry_type
+                )
+
+        if pushed is not None:
+            stats.count('groups', len(pushed))
+            self.write_pushed_groups(source, pushed, sink, fields)
+        elif group_field and self.vectorized and not use_union:
+            # Stream features into a small running state per group
+            if not self.stream_groups(source, sink, fields):
+                return False
+        elif group_field:
+            # Group features by field
+            groups = {}
+            stats.split()
+            for current, f in enumerate(source.getFeatures(self.request)):
+                stats.split('iteration')
+                if not self.report(current):
+                    return False
+
+                group_val = f[group_field]
+                if group_val not in groups:
+                    groups[group_val] = []
+                groups[group_val].append(f)
+                stats.split('grouping')
+            stats.count('features_read', sum(len(features) for features in groups.values()))
+            stats.count('groups', len(groups))
+
+            # Process each group
+            for group_val, features in groups.items():
+                stats.split()
+                geom, measurements = self.create_bounding_geometry(
+                    features, geometry_type, use_union
+                )
+                stats.split('geometry')
+                if not geom:
+                    continue
+
+                values = [group_val]
+                values.extend([features[0][field] for field in selected_fields])
+                if self.track_source:
+                    group_hash = sum(self.feature_hash(f) for f in features) & HASH_MASK
+                    values.append('{:016x}'.format(group_hash))
+
+                self.write_feature(
+                    sink, self.output_feature(fields, geom, values, measurements)
+                )
+        elif (self.vectorized and not use_union
+              and (geometry_type != 0 or self.measure or self.transformer is not None)):
+            # Process features in vectorized chunks. Envelopes skip this,
+            # the feature bounding box is already the result, unless it
+            # has to be reprojected in batches
+            chunks = self.feature_chunks(source)
+            if self.workers:
+                with BoundingPool(self.workers) as pool:
+                    results = pool.map(chunks, geometry_type, self.measure, self.tolerance)
+                    if not self.write_chunks(results, sink, fields):
+                        return False
+            else:
+                results = (
+                    (values, geometry_engine.bounding_wkbs(
+                        wkbs, geometry_type, measure=self.measure, tolerance=self.tolerance
+                    ))
+                    for values, wkbs in chunks
+                )
+                if not self.write_chunks(results, sink, fields):
+                    return False
+        else:
+            # Process each feature individually
+            stats.split()
+            for current, feature in enumerate(source.getFeatures(self.request)):
+                stats.split('iteration')
+                stats.count('features_read')
+                if not self.report(current):
+                    return False
+
+                # Create bounding geometry for single feature
+                geom, measurements = self.create_bounding_geometry(
+                    [feature], geometry_type, use_union
+                )
+                stats.split('geometry')
+                if not geom:
+                    stats.count('null_geometries')
+                    continue
+
+                values = [feature[field] for field in selected_fields]
+                values.extend(self.tracking_values(feature))
+
+                self.write_feature(
+                    sink, self.output_feature(fields, geom, values, measurements)
+                )
+
+        feedback.setProgress(100)
+        return True
+
+    def spill_file(self, partition_key=None):
+        """SpillFile for out-of-core aggregation, None without a memory limit"""
+        if not self.memory_limit:
+            return None
+        return SpillFile(self.memory_limit * 1024 * 1024, partition_key=partition_key)
+
+    def stream_groups(self, source, sink, fields):
+        """Aggregate groups of a single field, spilling past the memory limit"""
+        stats = self.stats
+        group_field = self.group_field
+        selected_fields = self.selected_fields
+        aggregator = GroupAggregator(
+            self.geometry_type, measure=self.measure, tolerance=self.tolerance,
+            transform=self.transformer
+        )
+        spill = self.spill_file()
+        hashes = {}
+        try:
+            stats.split()
+            for current, f in enumerate(source.getFeatures(self.request)):
+                stats.split('iteration')
+                stats.count('features_read')
+                if not self.report(current):
+                    return False
+
+                group_val = f[group_field]
+                if group_val not in aggregator:
+                    aggregator.add_group(
+                        group_val, [f[field] for field in selected_fields]
+                    )
+                if self.track_source:
+                    key = plain_key(group_val)
+                    hashes[key] = (hashes.get(key, 0) + self.feature_hash(f)) & HASH_MASK
+                stats.split('grouping')
+
+                if not f.hasGeometry() or f.geometry().isEmpty():
+                    stats.count('null_geometries')
+                    continue
+
+                if self.geometry_type == geometry_engine.ENVELOPE and not self.measure:
+                    bbox = f.geometry().boundingBox()
+                    aggregator.add_bounds(
+                        group_val,
+                        bbox.xMinimum(), bbox.yMinimum(),
+                        bbox.xMaximum(), bbox.yMaximum()
+                    )
+                else:
+                    aggregator.add_coordinates(
+                        group_val, geometry_engine.wkb_coordinates(self.feature_wkb(f))
+                    )
+                stats.split('geometry')
+                if spill is not None and spill.maybe_spill(aggregator, current):
+                    stats.count('spills')
+                    stats.split('writing')
+
+            parts = [aggregator] if spill is None else spill.aggregators(aggregator)
+            for part in parts:
+                stats.count('groups', len(part))
+                with stats.phase('geometry'):
+                    results = list(part.results())
+                for group_val, values, ring, measurements in results:
+                    geom = QgsGeometry()
+                    geom.fromWkb(geometry_engine.polygon_wkb(ring))
+                    if self.track_source:
+                        values = values + ['{:016x}'.format(hashes[plain_key(group_val)])]
+
+                    self.write_feature(
+                        sink, self.output_feature(fields, geom, [group_val] + values, measurements)
+                    )
+            return True
+        finally:
+            if spill is not None:
+                spill.close()
+
+    def process_levels(self, source, sink, fields, feedback):
+        """Group by every level in one scan, rolling coarser levels up"""
+        stats = self.stats
+        selected_fields = self.selected_fields
+        getters = self.level_getters(self.source_fields)
+        depth = len(getters)
+        engine = self.vectorized and not self.use_union
+        spill = None
+        if engine:
+            grouped = GroupAggregator(
+                self.geometry_type, measure=self.measure, tolerance=self.tolerance,
+                transform=self.transformer
+            )
+            # Rolled up groups must share a partition, split on the coarsest level
+            spill = self.spill_file(partition_key=lambda key: key[0])
+        else:
+            grouped = {}
+
+        try:
+            stats.split()
+            for current, f in enumerate(source.getFeatures(self.request)):
+                stats.split('iteration')
+                stats.count('features_read')
+                if not self.report(current):
+                    return False
+
+                key = tuple(getter(f) for getter in getters)
+                if not engine:
+                    grouped.setdefault(key, []).append(f)
+                    stats.split('grouping')
+                    continue
+
+                if key not in grouped:
+                    grouped.add_group(key, [f[field] for field in selected_fields])
+                stats.split('grouping')
+
+                if not f.hasGeometry() or f.geometry().isEmpty():
+                    stats.count('null_geometries')
+                    continue
+
+                if self.geometry_type == geometry_engine.ENVELOPE and not self.measure:
+                    bbox = f.geometry().boundingBox()
+                    grouped.add_bounds(
+                        key, bbox.xMinimum(), bbox.yMinimum(), bbox.xMaximum(), bbox.yMaximum()
+                    )
+                else:
+                    grouped.add_coordinates(
+                        key, geometry_engine.wkb_coordinates(self.feature_wkb(f))
+                    )
+                stats.split('geometry')
+                if spill is not None and spill.maybe_spill(grouped, current):
+                    stats.count('spills')
+                    stats.split('writing')
+
+            parts = [grouped] if spill is None else spill.aggregators(grouped)
+            for part in parts:
+                self.write_levels(part, depth, engine, sink, fields)
+        finally:
+            if spill is not None:
+                spill.close()
+
+        feedback.setProgress(100)
+        return True
+
+    def write_levels(self, grouped, depth, engine, sink, fields):
+        """Write the finest groups, and the coarser levels rolled up from them"""
+        stats = self.stats
+        levels = [(depth, grouped)]
+        if self.rollup:
+            for level in range(depth - 1, 0, -1):
+                finer = levels[-1][1]
+                with stats.phase('grouping'):
+                    if engine:
+                        coarser = finer.rollup(lambda key, level=level: key[:level])
+                    else:
+                        coarser = {}
+                        for key, features in finer.items():
+                            coarser.setdefault(key[:level], []).extend(features)
+                levels.append((level, coarser))
+
+        for level, grouped in levels:
+            stats.count('groups', len(grouped))
+            if engine:
+                with stats.phase('geometry'):
+                    results = list(grouped.results())
+                for key, values, ring, measurements in results:
+                    geom = QgsGeometry()
+                    geom.fromWkb(geometry_engine.polygon_wkb(ring))
+                    self.write_feature(sink, self.output_feature(
+                        fields, geom, self.level_values(level, key) + values, measurements
+                    ))
+                continue
+
+            for key, features in grouped.items():
+                stats.split()
+                geom, measurements = self.create_bounding_geometry(
+                    features, self.geometry_type, self.use_union
+                )
+                stats.split('geometry')
+                if not geom:
+                    continue
+
+                values = [features[0][field] for field in self.selected_fields]
+                self.write_feature(sink, self.output_feature(
+                    fields, geom, self.level_values(level, key) + values, measurements
+                ))
+
+    def write_pushed_groups(self, source, groups, sink, fields):
+        """Write groups computed by the data source, with first feature attributes"""
+        selected_fields = self.selected_fields
+        first_values = {}
+        if selected_fields:
+            request = QgsFeatureRequest().setFilterFids([fid for _, fid, _ in groups])
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+            request.setSubsetOfAttributes(selected_fields, self.source_fields)
+            for feature in source.getFeatures(request):
+                first_values[feature.id()] = [feature[field] for field in selected_fields]
+            self.stats.split('iteration')
+
+        for group_val, fid, geom in groups:
+            values = first_values.get(fid, [None] * len(selected_fields))
+            self.write_feature(
+                sink, self.output_feature(fields, geom, [group_val] + values)
+            )
+
+    def feature_chunks(self, source):
+        """Yield (attribute values, WKBs) for chunks of chunk_size features
+
+        When reprojecting, the WKBs hold the vertices in the target CRS.
+        """
+        values, wkbs = [], []
+        self.stats.split()
+        for feature in source.getFeatures(self.request):
+            self.stats.count('features_read')
+            values.append(
+                [feature[field] for field in self.selected_fields]
+                + self.tracking_values(feature)
+            )
+            wkbs.append(self.feature_wkb(feature))
+            self.stats.split('iteration')
+            if len(wkbs) >= self.chunk_size:
+                yield values, self.transform_chunk(wkbs)
+                values, wkbs = [], []
+        if wkbs:
+            yield values, self.transform_chunk(wkbs)
+
+    def transform_chunk(self, wkbs):
+        """Reproject a chunk of WKBs with one transform call"""
+        if self.transformer is None:
+            return wkbs
+        wkbs = self.transformer.wkbs(
+            wkbs, envelope=self.geometry_type == geometry_engine.ENVELOPE and not self.measure
+        )
+        self.stats.split('reprojection')
+        return wkbs
+
+    def write_chunks(self, results, sink, fields):
+        """Write (attribute values, bounding WKBs) chunks in input order
+
+        When measuring, the bounding WKBs come with their measurement array.
+        """
+        current = 0
+        for values, geometry_wkbs in results:
+            # Waiting for the next chunk covers its vectorized computation
+            self.stats.split('geometry')
+            if not self.report(current):
+                return False
+
+            if self.measure:
+                geometry_wkbs, measurements = geometry_wkbs
+            else:
+                measurements = [None] * len(geometry_wkbs)
+
+            for feature_values, wkb, row in zip(values, geometry_wkbs, measurements):
+                if wkb is None:
+                    self.stats.count('null_geometries')
+                    continue
+
+                geom = QgsGeometry()
+                geom.fromWkb(wkb)
+                self.write_feature(
+                    sink, self.output_feature(fields, geom, feature_values, row)
+                )
+
+            current += len(values)
+        return True
+
+    @staticmethod
+    def feature_wkb(feature):
+        """Linear WKB of a feature geometry, or None when it has none"""
+        if not feature.hasGeometry():
+            return None
+        geom = feature.geometry()
+        if QgsWkbTypes.isCurvedType(geom.wkbType()):
+            geom = QgsGeometry(geom.constGet().segmentize())
+        return bytes(geom.asWkb())
+
+    def output_feature(self, fields, geom, values, measurements=None):
+        """Build an output feature with extent attributes followed by values
+
+        ``measurements`` fill the measurement fields when measuring, NaN
+        and missing values are written as NULL.
+        """
+        # Building the output geometry counts as geometry work
+        self.stats.split('geometry')
+        new_feat = QgsFeature(fields)
+        new_feat.setGeometry(geom)
+
+        # Get extent information
+        bbox = geom.boundingBox()
+
+        attributes = [
+            bbox.xMinimum(),
+            bbox.yMinimum(),
+            bbox.xMaximum(),
+            bbox.yMaximum(),
+            bbox.toString()
+        ]
+        if self.measure:
+            if measurements is None:
+                attributes.extend([None] * len(MEASUREMENT_FIELDS))
+            else:
+                attributes.extend(
+                    None if math.isnan(value) else float(value) for value in measurements
+                )
+        attributes.extend(values)
+
+        new_feat.setAttributes(attributes)
+        self.stats.split('attributes')
+        return new_feat
+
+    def write_feature(self, sink, feature):
+        sink.addFeature(feature)
+        self.stats.count('features_written')
+        self.stats.split('writing')
+
+    def create_bounding_geometry(self, features, geometry_type, use_union=False):
+        """Return (bounding geometry, measurements) of a list of features
+
+        Measurements are None unless the processor measures.
+        """
+        geometries = [
+            f.geometry() for f in features
+            if f.hasGeometry() and not f.geometry().isEmpty()
+        ]
+        if not geometries:
+            return None, None
+
+        if use_union:
+            # Dissolve first, only when explicitly requested
+            combined = QgsGeometry.unaryUnion(geometries)
+            if not combined or combined.isEmpty():
+                return None, None
+            return self.bounding_geometry_from(combined, geometry_type)
+
+        if geometry_type == 0 and not self.measure:  # Envelope
+            # Running min/max over the input extents
+            bbox = geometries[0].boundingBox()
+            min_x, min_y = bbox.xMinimum(), bbox.yMinimum()
+            max_x, max_y = bbox.xMaximum(), bbox.yMaximum()
+            for geom in geometries[1:]:
+                bbox = geom.boundingBox()
+                min_x = min(min_x, bbox.xMinimum())
+                min_y = min(min_y, bbox.yMinimum())
+                max_x = max(max_x, bbox.xMaximum())
+                max_y = max(max_y, bbox.yMaximum())
+            rect = QgsRectangle(min_x, min_y, max_x, max_y)
+            if self.transformer is not None:
+                rect = self.transformer.rectangle(rect)
+            return QgsGeometry.fromRect(rect), None
+
+        # Hull, oriented rectangle and circle only depend on the vertices,
+        # so collecting the parts into one multi geometry is enough
+        if len(geometries) == 1:
+            combined = geometries[0]
+        else:
+            combined = QgsGeometry.collectGeometry(geometries)
+
+        return self.bounding_geometry_from(combined, geometry_type)
+
+    def bounding_geometry_from(self, geom, geometry_type):
+        """Return (bounding geometry, measurements), all derived from one hull"""
+        if geometry_type == 0 and not self.measure:  # Envelope
+            rect = geom.boundingBox()
+            if self.transformer is not None:
+                rect = self.transformer.rectangle(rect)
+            return QgsGeometry.fromRect(rect), None
+
+        if self.transformer is not None:
+            geom = self.transformer.geometry(geom)
+
+        # Everything else is derived from the convex hull
+        hull = geom.convexHull()
+        if not hull or hull.isEmpty():
+            return None, None
+
+        oriented = None
+        if geometry_type == 0:  # Envelope, the hull has the same extent
+            result = QgsGeometry.fromRect(hull.boundingBox())
+        elif geometry_type == 1:  # Oriented rectangle
+            oriented = hull.orientedMinimumBoundingBox()[0]
+            result = oriented
+        elif geometry_type == 2:  # Circle
+            result = hull.minimalEnclosingCircle()[0]
+        elif geometry_type == 3:  # Convex hull
+            result = hull
+        else:
+            return None, None
+
+        if not self.measure:
+            return result, None
+        return result, self.get_geometry_measurements(result, hull, oriented)
+
+    def get_geometry_measurements(self, geom, hull, oriented=None):
+        """Measurements of a bounding geometry, see MEASUREMENT_FIELDS
+
+        Width, height and angle describe the minimum oriented rectangle of
+        ``hull``: width is the longer side and angle its azimuth in degrees,
+        clockwise from north in [0, 180). Fill ratio is the hull area over
+        the bounding geometry area. ``oriented`` reuses a rectangle that
+        was already computed.
+        """
+        if oriented is None:
+            oriented = hull.orientedMinimumBoundingBox()[0]
+
+        width = height = angle = 0.0
+        corners = oriented.asPolygon() if oriented and not oriented.isEmpty() else None
+        if corners and len(corners[0]) >= 3:
+            p0, p1, p2 = corners[0][:3]
+            side_a = (p1.x() - p0.x(), p1.y() - p0.y())
+            side_b = (p2.x() - p1.x(), p2.y() - p1.y())
+            if math.hypot(*side_a) < math.hypot(*side_b):
+                side_a, side_b = side_b, side_a
+            width, height = math.hypot(*side_a), math.hypot(*side_b)
+            angle = math.degrees(math.atan2(side_a[0], side_a[1])) % 180.0
+
+        area = geom.area()
+        return [
+            width,
+            height,
+            angle,
+            area,
+            geom.constGet().perimeter(),
+            hull.area() / area if area > 0 else math.nan,
+        ]
@@ -0,0 +1,151 @@
+"""
+Grouped bounding geometries computed by the data source.
+
+For PostGIS, SpatiaLite and GeoPackage layers the grouped envelope and
+convex hull can be computed with one aggregate query, so the geometries
+never have to be transferred into Python. Every function returns None
+when the layer or options are not supported, and the caller falls back
+to the in-Python path.
+
+The query runs in the task thread, so everything it needs from the
+layer is captured up front in a LayerSource on the main thread.
+"""
+from qgis.core import (
+    QgsDataSourceUri, QgsGeometry, QgsPointXY, QgsProviderRegistry, QgsRectangle,
+    QgsWkbTypes
+)
+from qgis.PyQt.QtCore import QVariant
+
+from .pushdown_sql import CONVEX_HULL, ENVELOPE, grouped_query, quote_identifier
+
+
+class LayerSource:
+    """What push-down needs to know about a layer, read on the main thread"""
+
+    def __init__(self, layer):
+        self.provider_type = layer.providerType()
+        self.source = layer.source()
+        self.subset = layer.subsetString()
+        self.fields = layer.fields()
+        self.storage_type = layer.dataProvider().storageType()
+        # Unsaved edits are not visible to the data source
+        self.modified = layer.isEditable() and layer.isModified()
+
+
+def source_table(layer_source, connection):
+    """Return (dialect, table, geometry column, key column) for a LayerSource"""
+    provider = layer_source.provider_type
+    if provider in ('postgres', 'spatialite'):
+        uri = QgsDataSourceUri(layer_source.source)
+        key = uri.keyColumn()
+        if provider == 'postgres':
+            # QGIS feature ids only match single integer keys
+            index = layer_source.fields.indexOf(key)
+            if index < 0 or layer_source.fields.at(index).type() not in (
+                QVariant.Int, QVariant.LongLong
+            ):
+                return None
+            table = '{}.{}'.format(
+                quote_identifier(uri.schema() or 'public'), quote_identifier(uri.table())
+            )
+            key = quote_identifier(key)
+        else:
+            table = quote_identifier(uri.table())
+            key = quote_identifier(key) if key else 'ROWID'
+        if not uri.table() or not uri.geometryColumn():
+            return None
+        return provider, table, uri.geometryColumn(), key
+
+    if provider == 'ogr' and layer_source.storage_type == 'GPKG':
+        parts = QgsProviderRegistry.instance().decodeUri('ogr', layer_source.source)
+        table = parts.get('layerName')
+        if not table:
+            return None
+        rows = connection.executeSql(
+            "SELECT column_name FROM gpkg_geometry_columns WHERE table_name = '{}'".format(
+                table.replace("'", "''")
+            )
+        )
+        if not rows:
+            return None
+        column = rows[0][0]
+        # The feature id of a GeoPackage table is its rowid
+        return 'gpkg', quote_identifier(table), column, 'rowid'
+
+    return None
+
+
+def connection_for(layer_source):
+    """Open a provider connection to the database behind a LayerSource"""
+    provider = layer_source.provider_type
+    if provider == 'ogr':
+        path = QgsProviderRegistry.instance().decodeUri('ogr', layer_source.source)['path']
+        return QgsProviderRegistry.instance().providerMetadata('ogr').createConnection(path, {})
+    return QgsProviderRegistry.instance().providerMetadata(provider).createConnection(
+        layer_source.source, {}
+    )
+
+
+def hull_polygon(geom):
+    """Polygon of a hull returned by the database
+
+    Single features, collinear groups and point layers give a Point or
+    LineString hull. Like the in-Python path, their vertices become a
+    degenerate closed ring, so the Polygon sink accepts them.
+    """
+    if geom.type() == QgsWkbTypes.PolygonGeometry:
+        return geom
+    points = [QgsPointXY(vertex.x(), vertex.y()) for vertex in geom.vertices()]
+    if not points:
+        return None
+    return QgsGeometry.fromPolygonXY([points + points[:1]])
+
+
+def grouped_bounding_geometries(layer_source, group_field, geometry_type):
+    """Run the grouped aggregate on the data source
+
+    ``layer_source`` is a LayerSource. Returns a list of (group value,
+    first feature id, QgsGeometry), or None when push-down is not possible
+    or the query fails.
+    """
+    if layer_source.modified:
+        return None
+
+    if geometry_type not in (ENVELOPE, CONVEX_HULL):
+        return None
+
+    try:
+        connection = connection_for(layer_source)
+        source = source_table(layer_source, connection)
+        if source is None:
+            return None
+        dialect, table, geometry_column, key_column = source
+
+        sql = grouped_query(
+            dialect, table, geometry_column, key_column, group_field,
+            geometry_type, layer_source.subset or None
+        )
+        if sql is None:
+            return None
+
+        rows = connection.executeSql(sql)
+    except Exception:
+        return None
+
+    results = []
+    for row in rows:
+        group_val, first_fid = row[0], row[1]
+        if geometry_type == ENVELOPE:
+            if any(value is None for value in row[2:6]):
+                continue
+            geom = QgsGeometry.fromRect(QgsRectangle(*row[2:6]))
+        else:
+            if row[2] is None:
+                continue
+            geom = QgsGeometry()
+            geom.fromWkb(bytes(row[2]))
+            geom = hull_polygon(geom)
+            if geom is None:
+                continue
+        results.append((group_val, int(first_fid), geom))
+    return results
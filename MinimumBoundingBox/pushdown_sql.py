@@ -0,0 +1,61 @@
+"""
+SQL of the grouped aggregates pushed down to PostGIS, SpatiaLite and
+GeoPackage layers.
+
+Kept free of QGIS, so the queries can be checked against plain SQLite.
+"""
+ENVELOPE = 0
+CONVEX_HULL = 3
+
+# Per-vertex bound functions and hull expression of each SQL dialect
+DIALECTS = {
+    'postgres': {
+        'bounds': ('ST_XMin({0})', 'ST_YMin({0})', 'ST_XMax({0})', 'ST_YMax({0})'),
+        'hull': 'ST_AsBinary(ST_ConvexHull(ST_Collect({0})))',
+    },
+    'spatialite': {
+        'bounds': ('MbrMinX({0})', 'MbrMinY({0})', 'MbrMaxX({0})', 'MbrMaxY({0})'),
+        'hull': 'AsBinary(ConvexHull(Collect({0})))',
+    },
+    'gpkg': {
+        'bounds': ('ST_MinX({0})', 'ST_MinY({0})', 'ST_MaxX({0})', 'ST_MaxY({0})'),
+        # GeoPackage blobs have no portable hull function
+        'hull': None,
+    },
+}
+
+
+def quote_identifier(name):
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def grouped_query(dialect, table, geometry_column, key_column, group_field,
+                  geometry_type, where=None):
+    """Build the aggregate query for one group per row
+
+    Rows are (group value, first key, min_x, min_y, max_x, max_y) for
+    envelopes and (group value, first key, hull WKB) for convex hulls.
+    Returns None when the dialect can't compute the geometry type.
+    """
+    functions = DIALECTS.get(dialect)
+    if functions is None:
+        return None
+
+    geom = quote_identifier(geometry_column)
+    if geometry_type == ENVELOPE:
+        min_x, min_y, max_x, max_y = (f.format(geom) for f in functions['bounds'])
+        columns = [
+            f'MIN({min_x})', f'MIN({min_y})', f'MAX({max_x})', f'MAX({max_y})'
+        ]
+    elif geometry_type == CONVEX_HULL and functions['hull']:
+        columns = [functions['hull'].format(geom)]
+    else:
+        return None
+
+    group = quote_identifier(group_field)
+    sql = 'SELECT {}, MIN({}), {} FROM {} WHERE {} IS NOT NULL'.format(
+        group, key_column, ', '.join(columns), table, geom
+    )
+    if where:
+        sql += f' AND ({where})'
+    return sql + f' GROUP BY {group}'
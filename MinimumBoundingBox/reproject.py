@@ -0,0 +1,73 @@
+"""
+Batch reprojection of bounding geometry inputs.
+
+Instead of transforming every output geometry on its own, coordinates
+are packed into arrays and sent through one shared
+QgsCoordinateTransform per batch:
+
+- hulls, oriented rectangles and circles are computed from the input
+  vertices transformed to the target CRS, so they are exact there
+- envelopes transform the boundary of each source extent, densified
+  like ``QgsCoordinateTransform.transformBoundingBox`` does, so the box
+  still holds the feature where grid lines curve in the target CRS
+
+The transform is built on the main thread and only used by the thread
+running the processor.
+"""
+from qgis.core import QgsCoordinateTransform, QgsGeometry, QgsLineString
+
+try:
+    import numpy as np
+    from . import geometry_engine
+except ImportError:  # NumPy is not available, only the QGIS fallbacks work
+    np = geometry_engine = None
+
+# Points per side when transforming an extent
+DENSIFY_POINTS = 21
+
+
+class BulkTransform:
+    def __init__(self, source_crs, target_crs, transform_context):
+        self.transform = QgsCoordinateTransform(source_crs, target_crs, transform_context)
+
+    def coords(self, coords):
+        """Transform an (n, 2) coordinate array in a single call"""
+        if not len(coords):
+            return coords
+        line = QgsLineString(coords[:, 0].tolist(), coords[:, 1].tolist())
+        line.transform(self.transform)
+        return np.column_stack([
+            np.asarray(line.xVector(), dtype=np.float64),
+            np.asarray(line.yVector(), dtype=np.float64),
+        ])
+
+    def bounds(self, bounds):
+        """Transform (n, 4) extents through their densified boundaries"""
+        coords, offsets = geometry_engine.densified_rectangles(bounds, DENSIFY_POINTS)
+        return geometry_engine.envelopes(self.coords(coords), offsets)
+
+    def wkbs(self, wkbs, envelope=False):
+        """Vertices of WKB geometries in the target CRS, as LineString WKB
+
+        With ``envelope`` only the densified extent of each geometry is
+        transformed, which is all an envelope needs.
+        """
+        coords, offsets = geometry_engine.pack_wkb(wkbs)
+        if envelope:
+            coords, offsets = geometry_engine.densified_rectangles(
+                geometry_engine.envelopes(coords, offsets), DENSIFY_POINTS
+            )
+        coords = self.coords(coords)
+        return [
+            geometry_engine.linestring_wkb(coords[start:end]) if end > start else None
+            for start, end in zip(offsets[:-1], offsets[1:])
+        ]
+
+    def rectangle(self, rect):
+        return self.transform.transformBoundingBox(rect)
+
+    def geometry(self, geom):
+        """Transformed copy of a QgsGeometry"""
+        geom = QgsGeometry(geom)
+        geom.transform(self.transform)
+        return geom
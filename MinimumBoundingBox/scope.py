@@ -0,0 +1,109 @@
+"""
+Input scopes: all features, the selection, or the features in an extent.
+
+Extent scopes use the provider's spatial index through a filter rect when
+there is one. Otherwise a QgsSpatialIndex is built the first time and
+cached per layer until the layer's features change.
+"""
+from qgis.core import QgsFeatureRequest, QgsFeatureSource, QgsSpatialIndex
+
+SCOPE_ALL = 0
+SCOPE_SELECTED = 1
+SCOPE_EXTENT = 2
+
+SCOPES = [
+    "All features",
+    "Selected features",
+    "Features in extent",
+]
+
+
+class SpatialIndexCache:
+    """QgsSpatialIndex per layer id, dropped when the layer is edited"""
+
+    def __init__(self):
+        self.indexes = {}
+        self.watched = {}
+
+    def watch(self, layer):
+        """Invalidate the index on edits, must be called on the main thread"""
+        layer_id = layer.id()
+        if layer_id in self.watched:
+            return
+
+        def invalidate(*args):
+            self.indexes.pop(layer_id, None)
+
+        signals = (
+            layer.featureAdded, layer.featureDeleted, layer.geometryChanged,
+            layer.dataSourceChanged, layer.afterCommitChanges
+        )
+        for signal in signals:
+            signal.connect(invalidate)
+        layer.willBeDeleted.connect(lambda: self.forget(layer_id))
+        self.watched[layer_id] = invalidate
+
+    def forget(self, layer_id):
+        self.indexes.pop(layer_id, None)
+        self.watched.pop(layer_id, None)
+
+    def index(self, layer_id, source):
+        index = self.indexes.get(layer_id)
+        if index is None:
+            request = QgsFeatureRequest().setNoAttributes()
+            index = QgsSpatialIndex(source.getFeatures(request))
+            self.indexes[layer_id] = index
+        return index
+
+    def clear(self):
+        self.indexes.clear()
+
+
+INDEX_CACHE = SpatialIndexCache()
+
+
+class InputScope:
+    """Limits a run to part of a layer
+
+    Built on the main thread. ``request`` may build a spatial index and is
+    meant to be called from the task.
+    """
+
+    def __init__(self, layer, scope=SCOPE_ALL, extent=None):
+        self.scope = scope
+        self.extent = extent
+        self.layer_id = layer.id()
+        self.selected_ids = []
+        self.provider_index = False
+
+        if scope == SCOPE_SELECTED:
+            self.selected_ids = layer.selectedFeatureIds()
+        elif scope == SCOPE_EXTENT:
+            if extent is None or extent.isEmpty():
+                raise ValueError("No extent set for the input scope")
+            self.provider_index = (
+                layer.hasSpatialIndex() == QgsFeatureSource.SpatialIndexPresent
+            )
+            if not self.provider_index:
+                INDEX_CACHE.watch(layer)
+
+    @property
+    def is_partial(self):
+        return self.scope != SCOPE_ALL
+
+    def request(self, source):
+        """Feature request for the scope, None for the whole layer"""
+        if self.scope == SCOPE_SELECTED:
+            return QgsFeatureRequest().setFilterFids(self.selected_ids)
+        if self.scope == SCOPE_EXTENT:
+            if self.provider_index:
+                return QgsFeatureRequest().setFilterRect(self.extent)
+            index = INDEX_CACHE.index(self.layer_id, source)
+            return QgsFeatureRequest().setFilterFids(index.intersects(self.extent))
+        return None
+
+    def feature_count(self, request, total):
+        """Number of features the request will visit, for progress"""
+        if request is not None and request.filterType() == QgsFeatureRequest.FilterFids:
+            return len(request.filterFids())
+        return total
@@ -0,0 +1,163 @@
+"""
+Out-of-core group aggregation.
+
+When the running group state grows past a memory limit, the partials of
+a GroupAggregator (first feature values, envelope and hull per group) are
+appended to temporary partition files and the aggregator starts over.
+Groups are assigned to partitions by key, so the final merge only holds
+one partition in memory at a time. A partition file that is still larger
+than the memory limit is split again, with as many parts as its size
+needs, so the limit holds however much state was spilled.
+"""
+import math
+import os
+import pickle
+import shutil
+import tempfile
+
+from .aggregation import GroupAggregator
+from .columnar import plain_value
+
+SPILL_PARTITIONS = 64
+
+# Features read between two checks of the memory estimate
+CHECK_INTERVAL = 1000
+
+# Rounds of splitting an oversized partition before merging it anyway
+MAX_SPLIT_DEPTH = 8
+
+
+def plain_key(key):
+    """Group key with NULLs as None, so it can be pickled"""
+    if isinstance(key, tuple):
+        return tuple(plain_value(part) for part in key)
+    return plain_value(key)
+
+
+class SpillFile:
+    """Partition files holding spilled group partials
+
+    ``partition_key`` maps a group key to the part deciding its partition,
+    e.g. the coarsest level, so groups that are rolled up together end up
+    in the same partition.
+    """
+
+    def __init__(self, memory_limit, partitions=SPILL_PARTITIONS, partition_key=None,
+                 directory=None):
+        self.memory_limit = memory_limit
+        self.partitions = partitions
+        self.partition_key = partition_key or (lambda key: key)
+        self.directory = tempfile.mkdtemp(prefix='minimum_bounding_box_', dir=directory)
+        self.files = [None] * partitions
+        self.spills = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def maybe_spill(self, aggregator, current):
+        """Spill the aggregator when it exceeds the memory limit"""
+        if current % CHECK_INTERVAL or aggregator.memory_estimate() <= self.memory_limit:
+            return False
+        self.spill(aggregator)
+        return True
+
+    def spill(self, aggregator):
+        for key, values, bounds, hull in aggregator.drain():
+            key = plain_key(key)
+            index = hash(self.partition_key(key)) % self.partitions
+            f = self.files[index]
+            if f is None:
+                f = self.files[index] = open(
+                    os.path.join(self.directory, f'part_{index}.pickle'), 'wb'
+                )
+            pickle.dump(
+                (key, [plain_value(value) for value in values], bounds, hull),
+                f, pickle.HIGHEST_PROTOCOL
+            )
+        self.spills += 1
+
+    def aggregators(self, aggregator):
+        """Yield one merged GroupAggregator per partition
+
+        ``aggregator`` holds the groups that were not spilled yet. Without
+        any spill it is yielded as is.
+        """
+        if not self.spills:
+            yield aggregator
+            return
+
+        self.spill(aggregator)
+        paths = []
+        for index, f in enumerate(self.files):
+            if f is not None:
+                f.close()
+                paths.append(f.name)
+        self.files = [None] * self.partitions
+
+        for path in paths:
+            yield from self.merge(path, aggregator)
+
+    def merge(self, path, aggregator, depth=0):
+        """Merged GroupAggregators of a partition file
+
+        Files larger than the memory limit are split by key first. Groups
+        sharing a partition key can't be split, so a file whose records
+        all land in one part is merged as it is.
+        """
+        size = os.path.getsize(path)
+        if size > self.memory_limit and depth < MAX_SPLIT_DEPTH:
+            parts = self.split(path, 2 * math.ceil(size / self.memory_limit), depth)
+            os.remove(path)
+            if len(parts) > 1:
+                for part in parts:
+                    yield from self.merge(part, aggregator, depth + 1)
+                return
+            path = parts[0]
+
+        merged = GroupAggregator(
+            aggregator.geometry_type, aggregator.flush_vertices,
+            aggregator.measure, aggregator.tolerance, aggregator.transform
+        )
+        for partial in self.read(path):
+            merged.add_partial(*partial)
+        os.remove(path)
+        yield merged
+
+    def split(self, path, count, depth):
+        """Spread the records of a partition file over up to ``count`` new files"""
+        count = min(count, SPILL_PARTITIONS)
+        files = {}
+        try:
+            for partial in self.read(path):
+                # Salted with the depth, or every record would hash alike again
+                index = hash((depth, self.partition_key(partial[0]))) % count
+                f = files.get(index)
+                if f is None:
+                    f = files[index] = tempfile.NamedTemporaryFile(
+                        'wb', suffix='.pickle', dir=self.directory, delete=False
+                    )
+                pickle.dump(partial, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            for f in files.values():
+                f.close()
+        return [f.name for f in files.values()]
+
+    @staticmethod
+    def read(path):
+        with open(path, 'rb') as partials:
+            while True:
+                try:
+                    yield pickle.load(partials)
+                except EOFError:
+                    return
+
+    def close(self):
+        for f in self.files:
+            if f is not None:
+                f.close()
+        self.files = [None] * self.partitions
+        shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,526 @@
+"""
+Benchmarks for the Minimum Bounding Box plugin.
+
+Generates synthetic polygon layers and times every geometry type, grouped
+and ungrouped, with memory and GeoPackage inputs and outputs. Inputs are
+generated block by block to files by a separate process, then each case
+runs in its own process that streams its input back in. The peak RSS is
+reset right before processing, so it belongs to the processing step of
+that case only, and ``rss_before_kb`` tells what the loaded input took.
+Results are written as JSON and can be compared between runs:
+
+    python benchmarks/bench_bounding_box.py --sizes 1000 100000 -o new.json
+    python benchmarks/bench_bounding_box.py --compare old.json new.json
+
+The ``qgis`` backend runs the processor with its NumPy kernels, the
+``baseline`` backend the same processor with one QGIS geometry call per
+feature or group, as before the kernels existed. Every qgis case is
+checked against its baseline, and the run exits with 1 when the kernels
+are slower by more than ``--threshold``.
+
+Cases that need QGIS are skipped when qgis.core can't be imported, the
+``engine`` backend only needs NumPy.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MinimumBoundingBox import geometry_engine  # noqa: E402
+
+GEOMETRY_TYPES = {
+    geometry_engine.ENVELOPE: 'envelope',
+    geometry_engine.ORIENTED_RECTANGLE: 'oriented_rectangle',
+    geometry_engine.CIRCLE: 'circle',
+    geometry_engine.CONVEX_HULL: 'convex_hull',
+}
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+FULL_SIZES = [1000, 10000, 100000, 1000000, 5000000]
+
+# Features generated and read per block, bounding the memory of both steps
+BLOCK_SIZE = 10000
+
+
+def peak_rss_kb():
+    """Peak RSS since the last reset_peak_rss, or since the process started"""
+    status = proc_status('VmHWM')
+    if status is not None:
+        return status
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def rss_kb():
+    return proc_status('VmRSS')
+
+
+def proc_status(name):
+    """A kB value of /proc/self/status, None where it is not available"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(name + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss():
+    """Restart the peak RSS from the current RSS, Linux only
+
+    Returns False where the peak can't be reset, it then includes
+    everything the process did before.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+def synthetic_blocks(count, vertices, seed=0):
+    """Random star shaped polygons as lists of Polygon WKB, BLOCK_SIZE at a time
+
+    Every block has its own seed, so the polygons don't depend on how many
+    blocks are held at once.
+    """
+    side = max(1, int(np.sqrt(count)))
+    for first in range(0, count, BLOCK_SIZE):
+        index = np.arange(first, min(first + BLOCK_SIZE, count))
+        rng = np.random.default_rng([seed, first])
+        centers = np.column_stack([(index % side) * 100.0, (index // side) * 100.0])
+        angles = np.sort(rng.uniform(0, 2 * np.pi, (len(index), vertices)), axis=1)
+        radii = rng.uniform(10, 45, (len(index), vertices))
+        xs = centers[:, :1] + radii * np.cos(angles)
+        ys = centers[:, 1:] + radii * np.sin(angles)
+        rings = np.stack([xs, ys], axis=2)
+        rings = np.concatenate([rings, rings[:, :1]], axis=1)
+        yield [geometry_engine.polygon_wkb(ring) for ring in rings]
+
+
+def input_key(case):
+    """Cases sharing an input file"""
+    groups = case['groups'] if case['backend'] != 'engine' else None
+    return case['backend'], case['features'], case['vertices'], groups
+
+
+def generate_input(case, directory):
+    """Write the synthetic input of a case to ``directory``, block by block
+
+    The engine reads a WKB blob with an offsets array, QGIS cases a
+    GeoPackage that memory input cases copy into a memory layer.
+    """
+    if case['backend'] == 'engine':
+        offsets = [0]
+        with open(os.path.join(directory, 'input.wkb'), 'wb') as f:
+            for wkbs in synthetic_blocks(case['features'], case['vertices']):
+                for wkb in wkbs:
+                    f.write(wkb)
+                    offsets.append(offsets[-1] + len(wkb))
+        np.save(os.path.join(directory, 'input_offsets.npy'), np.array(offsets, dtype=np.int64))
+        return
+
+    from qgis.core import (
+        QgsApplication, QgsCoordinateReferenceSystem, QgsCoordinateTransformContext,
+        QgsFeature, QgsField, QgsFields, QgsGeometry, QgsVectorFileWriter, QgsWkbTypes
+    )
+    from qgis.PyQt.QtCore import QVariant
+
+    app = QgsApplication([], False)
+    app.initQgis()
+    fields = QgsFields()
+    for field in (QgsField('id', QVariant.Int), QgsField('grp', QVariant.Int),
+                  QgsField('name', QVariant.String)):
+        fields.append(field)
+    options = QgsVectorFileWriter.SaveVectorOptions()
+    options.driverName = 'GPKG'
+    writer = QgsVectorFileWriter.create(
+        os.path.join(directory, 'input.gpkg'), fields, QgsWkbTypes.Polygon,
+        QgsCoordinateReferenceSystem('EPSG:3857'), QgsCoordinateTransformContext(), options
+    )
+    if writer.hasError():
+        raise IOError(writer.errorMessage())
+
+    groups = case['groups'] or case['features']
+    i = 0
+    for wkbs in synthetic_blocks(case['features'], case['vertices']):
+        features = []
+        for wkb in wkbs:
+            feature = QgsFeature(fields)
+            geom = QgsGeometry()
+            geom.fromWkb(wkb)
+            feature.setGeometry(geom)
+            feature.setAttributes([i, i % groups, f'feature {i}'])
+            features.append(feature)
+            i += 1
+        if not writer.addFeatures(features):
+            raise IOError(writer.errorMessage())
+    del writer
+    app.exitQgis()
+
+
+def engine_chunks(directory):
+    """WKB lists of the engine input, BLOCK_SIZE features at a time"""
+    offsets = np.load(os.path.join(directory, 'input_offsets.npy'))
+    blob = np.memmap(os.path.join(directory, 'input.wkb'), dtype=np.uint8, mode='r')
+    for first in range(0, len(offsets) - 1, BLOCK_SIZE):
+        bounds = offsets[first:first + BLOCK_SIZE + 1]
+        data = blob[bounds[0]:bounds[-1]].tobytes()
+        yield [data[start - bounds[0]:end - bounds[0]]
+               for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def run_engine_case(case, directory):
+    """Stream the input through the engine the way the processor does"""
+    timings = dict.fromkeys(('read', 'geometry', 'write'), 0.0)
+    aggregator = None
+    if case['groups']:
+        from MinimumBoundingBox.aggregation import GroupAggregator
+        aggregator = GroupAggregator(case['geometry_type'])
+
+    first = 0
+    last = time.perf_counter()
+    for wkbs in engine_chunks(directory):
+        coords, offsets = geometry_engine.pack_wkb(wkbs)
+        now = time.perf_counter()
+        timings['read'] += now - last
+        last = now
+
+        if aggregator is None:
+            rings = geometry_engine.bounding_rings(coords, offsets, case['geometry_type'])
+            now = time.perf_counter()
+            timings['geometry'] += now - last
+            last = now
+            [geometry_engine.polygon_wkb(ring) for ring in rings if ring is not None]
+            now = time.perf_counter()
+            timings['write'] += now - last
+        else:
+            for i in range(len(wkbs)):
+                key = (first + i) % case['groups']
+                if key not in aggregator:
+                    aggregator.add_group(key, [])
+                aggregator.add_coordinates(key, coords[offsets[i]:offsets[i + 1]])
+            now = time.perf_counter()
+            timings['geometry'] += now - last
+        last = now
+        first += len(wkbs)
+
+    if aggregator is not None:
+        rings = [ring for _, _, ring, _ in aggregator.results()]
+        now = time.perf_counter()
+        timings['geometry'] += now - last
+        [geometry_engine.polygon_wkb(ring) for ring in rings if ring is not None]
+        timings['write'] += time.perf_counter() - now
+    return timings
+
+
+class NullFeedback:
+    def setProgress(self, progress):
+        pass
+
+    def isCanceled(self):
+        return False
+
+
+def qgis_layer(case, directory):
+    """The generated GeoPackage, or a memory copy of it for memory inputs"""
+    from qgis.core import QgsFeatureRequest, QgsVectorLayer
+
+    layer = QgsVectorLayer(os.path.join(directory, 'input.gpkg'), 'input', 'ogr')
+    if not layer.isValid():
+        raise IOError(f"Could not open the generated input in {directory}")
+    if case['input'] != 'memory':
+        return layer
+
+    memory = QgsVectorLayer('Polygon?crs=EPSG:3857', 'input', 'memory')
+    fields = [field for field in layer.fields() if field.name() != 'fid']
+    memory.dataProvider().addAttributes(fields)
+    memory.updateFields()
+    request = QgsFeatureRequest().setSubsetOfAttributes(
+        [layer.fields().lookupField(field.name()) for field in fields]
+    )
+    features = []
+    for feature in layer.getFeatures(request):
+        feature.setFields(memory.fields(), False)
+        feature.setAttributes([feature[field.name()] for field in fields])
+        features.append(feature)
+        if len(features) == BLOCK_SIZE:
+            memory.dataProvider().addFeatures(features)
+            features = []
+    memory.dataProvider().addFeatures(features)
+    return memory
+
+
+def run_qgis_case(case, directory):
+    """Run the processor, timed by its own RunStats phases
+
+    Returns the timings and the run stats. Iteration counts as reading
+    and writing as writing. Grouping, geometry and the rest count as
+    geometry.
+    """
+    from qgis.core import (
+        QgsApplication, QgsProject, QgsVectorFileWriter, QgsVectorLayer,
+        QgsVectorLayerFeatureSource, QgsWkbTypes
+    )
+    from MinimumBoundingBox.instrumentation import RunStats
+    from MinimumBoundingBox.processor import BoundingGeometryProcessor
+    from MinimumBoundingBox.pushdown import LayerSource
+
+    app = QgsApplication([], False)
+    app.initQgis()
+
+    with tempfile.TemporaryDirectory() as output_directory:
+        layer = qgis_layer(case, directory)
+        processor = BoundingGeometryProcessor(
+            case['geometry_type'], 'grp' if case['groups'] else None, ['name']
+        )
+        processor.vectorized = case['backend'] == 'qgis'
+        source = QgsVectorLayerFeatureSource(layer)
+        fields = processor.output_fields(layer.fields())
+
+        if case['output'] == 'memory':
+            output = QgsVectorLayer('Polygon?crs=EPSG:3857', 'output', 'memory')
+            output.dataProvider().addAttributes(fields)
+            output.updateFields()
+            sink = output.dataProvider()
+        else:
+            options = QgsVectorFileWriter.SaveVectorOptions()
+            options.driverName = 'GPKG'
+            path = os.path.join(output_directory, 'output.gpkg')
+            output = sink = QgsVectorFileWriter.create(
+                path, fields, QgsWkbTypes.Polygon, layer.crs(),
+                QgsProject.instance().transformContext(), options
+            )
+
+        stats = RunStats()
+        rss_before = rss_kb()
+        reset = reset_peak_rss()
+        processor.process(
+            source, layer.fields(), sink, fields, NullFeedback(),
+            layer.featureCount(), LayerSource(layer), stats=stats
+        )
+        peak = peak_rss_kb()
+        del sink, output
+
+    app.exitQgis()
+    times = stats.times
+    timings = {
+        'read': times.get('iteration', 0.0),
+        'write': times.get('writing', 0.0),
+    }
+    timings['geometry'] = sum(times.values()) - timings['read'] - timings['write']
+    return timings, stats.as_dict(), rss_before, peak if reset else None
+
+
+def run_case(case, directory):
+    stats = None
+    if case['backend'] == 'engine':
+        rss_before = rss_kb()
+        reset = reset_peak_rss()
+        timings = run_engine_case(case, directory)
+        peak = peak_rss_kb() if reset else None
+    else:
+        timings, stats, rss_before, peak = run_qgis_case(case, directory)
+    seconds = timings['read'] + timings['geometry'] + timings['write']
+    result = dict(case)
+    result['geometry_type'] = GEOMETRY_TYPES[case['geometry_type']]
+    result.update({
+        'seconds': seconds,
+        'features_per_second': case['features'] / seconds if seconds else None,
+        # None where the peak could not be limited to the processing step
+        'peak_rss_kb': peak,
+        'rss_before_kb': rss_before,
+        'phases': timings,
+    })
+    if stats is not None:
+        result['stats'] = stats
+    return result
+
+
+def qgis_available():
+    try:
+        import qgis.core  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_cases(args):
+    backends = ['engine']
+    if qgis_available() and not args.engine_only:
+        backends.extend(['qgis', 'baseline'])
+
+    cases = []
+    for backend in backends:
+        io_modes = [('memory', 'memory'), ('gpkg', 'gpkg')] if backend != 'engine' else [('memory', 'memory')]
+        for features in args.sizes:
+            for vertices in args.vertices:
+                for groups in args.groups:
+                    for geometry_type in args.types:
+                        for source, output in io_modes:
+                            cases.append({
+                                'backend': backend,
+                                'features': features,
+                                'vertices': vertices,
+                                'groups': groups,
+                                'geometry_type': geometry_type,
+                                'input': source,
+                                'output': output,
+                            })
+    return cases
+
+
+def case_key(result):
+    return tuple(result[key] for key in (
+        'backend', 'features', 'vertices', 'groups', 'geometry_type', 'input', 'output'
+    ))
+
+
+def check_baseline(results, threshold):
+    """Compare qgis cases with their baseline, returns the count of slower ones"""
+    baselines = {
+        case_key(result)[1:]: result for result in results if result['backend'] == 'baseline'
+    }
+    slower = 0
+    for result in results:
+        baseline = baselines.get(case_key(result)[1:])
+        if result['backend'] != 'qgis' or baseline is None:
+            continue
+        ratio = result['seconds'] / baseline['seconds'] if baseline['seconds'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER THAN BASELINE'
+            slower += 1
+        print('{:<70} {:>9.3f}s baseline, {:>9.3f}s kernels  x{:.2f}{}'.format(
+            ' '.join(str(part) for part in case_key(result)[1:]),
+            baseline['seconds'], result['seconds'], ratio, flag
+        ))
+    return slower
+
+
+def compare(old_path, new_path, threshold):
+    with open(old_path) as f:
+        old = {case_key(r): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = json.load(f)['results']
+
+    regressions = 0
+    for result in new:
+        before = old.get(case_key(result))
+        if before is None:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print('{:<70} {:>9.3f}s -> {:>9.3f}s  x{:.2f}{}'.format(
+            ' '.join(str(part) for part in case_key(result)),
+            before['seconds'], result['seconds'], ratio, flag
+        ))
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--full', action='store_true', help='1k to 5M features')
+    parser.add_argument('--vertices', type=int, nargs='+', default=[8, 64])
+    parser.add_argument('--groups', type=int, nargs='+', default=[0, 100],
+                        help='group cardinalities, 0 for ungrouped')
+    parser.add_argument('--types', type=int, nargs='+', default=list(GEOMETRY_TYPES))
+    parser.add_argument('--engine-only', action='store_true')
+    parser.add_argument('-o', '--output', default='bench_output.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='relative slowdown reported as a regression')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--generate', help=argparse.SUPPRESS)
+    parser.add_argument('--input-dir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        # Child process: write the input of a case
+        generate_input(json.loads(args.generate), args.input_dir)
+        return 0
+
+    if args.case:
+        # Child process: run one case and print its result
+        print(json.dumps(run_case(json.loads(args.case), args.input_dir)))
+        return 0
+
+    if args.compare:
+        return compare(args.compare[0], args.compare[1], args.threshold)
+
+    if args.full:
+        args.sizes = FULL_SIZES
+
+    results = []
+    key = input_dir = None
+    generated = False
+    with tempfile.TemporaryDirectory() as directory:
+        for case in build_cases(args):
+            # Cases are ordered so that cases sharing an input follow each other
+            if input_key(case) != key:
+                key = input_key(case)
+                if input_dir is not None:
+                    shutil.rmtree(input_dir)
+                input_dir = tempfile.mkdtemp(dir=directory)
+                completed = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), '--generate',
+                     json.dumps(case), '--input-dir', input_dir],
+                    capture_output=True, text=True
+                )
+                generated = not completed.returncode
+                if not generated:
+                    print(f"FAILED generating {case}: {completed.stderr.strip()}",
+                          file=sys.stderr)
+            if not generated:
+                continue
+
+            completed = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--case', json.dumps(case),
+                 '--input-dir', input_dir],
+                capture_output=True, text=True
+            )
+            if completed.returncode:
+                print(f"FAILED {case}: {completed.stderr.strip()}", file=sys.stderr)
+                continue
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print('{backend:<6} {features:>8} feats {vertices:>4} verts {groups:>5} groups '
+                  '{geometry_type:<18} {input}->{output}: {seconds:8.3f}s '
+                  '{features_per_second:>12.0f} feat/s {peak_rss_kb} KB'.format(**result))
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': sys.version,
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'results': results,
+        }, f, indent=2)
+    return 1 if check_baseline(results, args.threshold) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
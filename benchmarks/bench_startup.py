@@ -0,0 +1,136 @@
+"""
+Startup cost of the Minimum Bounding Box plugin.
+
+Times what QGIS does for the plugin at startup: importing the package,
+``classFactory`` and ``initGui``, each repeat in a fresh process after
+QGIS itself is initialized. Also lists the heavy modules the plugin
+pulled in on the way. Point ``--plugin-dir`` at another checkout to
+compare two versions:
+
+    git worktree add /tmp/mbb_old <revision>
+    python benchmarks/bench_startup.py --plugin-dir /tmp/mbb_old/MinimumBoundingBox -o old.json
+    python benchmarks/bench_startup.py -o new.json
+    python benchmarks/bench_startup.py --compare old.json new.json
+
+Needs qgis.core, the QGIS testing helpers and the processing plugin on
+the Python path.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+DEFAULT_PLUGIN_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'MinimumBoundingBox'
+)
+
+# Modules that are worth keeping out of QGIS startup
+HEAVY_MODULES = (
+    'numpy', 'pyarrow', 'processing.tools', 'multiprocessing', 'concurrent.futures'
+)
+
+PHASES = ('import', 'init_gui', 'total')
+
+
+def run_once(plugin_dir):
+    """Start the plugin in this process and return its timings"""
+    from qgis.testing import start_app
+    from qgis.testing.mocked import get_iface
+
+    start_app()
+    iface = get_iface()
+    sys.path.insert(0, os.path.dirname(os.path.abspath(plugin_dir)))
+    before = set(sys.modules)
+
+    start = time.perf_counter()
+    package = importlib.import_module(os.path.basename(os.path.normpath(plugin_dir)))
+    plugin = package.classFactory(iface)
+    imported = time.perf_counter()
+    plugin.initGui()
+    end = time.perf_counter()
+    plugin.unload()
+
+    loaded = set(sys.modules) - before
+    return {
+        'import': imported - start,
+        'init_gui': end - imported,
+        'total': end - start,
+        'modules': len(loaded),
+        'heavy_modules': [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def measure(plugin_dir, repeats):
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--plugin-dir', plugin_dir,
+             '--child'],
+            capture_output=True, text=True
+        )
+        if completed.returncode:
+            raise RuntimeError(completed.stderr.strip())
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    result = {phase: statistics.median(run[phase] for run in runs) for phase in PHASES}
+    result['repeats'] = repeats
+    result['modules'] = runs[-1]['modules']
+    result['heavy_modules'] = runs[-1]['heavy_modules']
+    return result
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)['result']
+    with open(new_path) as f:
+        new = json.load(f)['result']
+    for phase in PHASES:
+        ratio = new[phase] / old[phase] if old[phase] else 1.0
+        print('{:<10} {:>9.1f} ms -> {:>9.1f} ms  x{:.2f}'.format(
+            phase, old[phase] * 1000, new[phase] * 1000, ratio
+        ))
+    print('{:<10} {:>12} -> {:>12}'.format('modules', old['modules'], new['modules']))
+    print('heavy      {} -> {}'.format(
+        ', '.join(old['heavy_modules']) or '-', ', '.join(new['heavy_modules']) or '-'
+    ))
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--plugin-dir', default=DEFAULT_PLUGIN_DIR)
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('-o', '--output', default='bench_startup.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_once(args.plugin_dir)))
+        return 0
+
+    if args.compare:
+        return compare(*args.compare)
+
+    result = measure(args.plugin_dir, args.repeats)
+    print('import {:.1f} ms, initGui {:.1f} ms, total {:.1f} ms, {} modules, heavy: {}'.format(
+        result['import'] * 1000, result['init_gui'] * 1000, result['total'] * 1000,
+        result['modules'], ', '.join(result['heavy_modules']) or '-'
+    ))
+    with open(args.output, 'w') as f:
+        json.dump({
+            'python': sys.version,
+            'platform': platform.platform(),
+            'plugin_dir': os.path.abspath(args.plugin_dir),
+            'result': result,
+        }, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
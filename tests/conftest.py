@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The plugin folder is not an installed package, import it from the checkout
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
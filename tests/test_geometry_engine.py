@@ -0,0 +1,377 @@
+"""
+Checks of the vectorized engine against brute force. Runs without QGIS.
+"""
+import itertools
+import math
+import struct
+
+import numpy as np
+import pytest
+
+from MinimumBoundingBox import geometry_engine as engine
+
+
+def random_features(rng, count=40, max_vertices=30):
+    """Mixed random, gridded (duplicates, collinear) and circular vertex sets"""
+    arrays = []
+    for i in range(count):
+        size = int(rng.integers(0, max_vertices))
+        kind = i % 4
+        if kind == 0:
+            points = rng.random((size, 2)) * 100
+        elif kind == 1:
+            points = np.round(rng.random((size, 2)) * 4)
+        elif kind == 2:
+            t = rng.random(size)
+            points = np.column_stack([t, 2 * t + 1])
+        else:
+            angles = rng.random(size) * 2 * np.pi
+            points = np.column_stack([np.cos(angles), np.sin(angles)]) * 1e3 + 1e6
+        arrays.append(points)
+    return arrays
+
+
+def split(coords, offsets):
+    return [coords[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+
+def tolerance_of(points):
+    return 1e-9 * max(1.0, float(np.abs(points).max())) if len(points) else 0.0
+
+
+def ring_area(ring):
+    x, y = ring[:, 0], ring[:, 1]
+    return 0.5 * float(np.sum(x * np.roll(y, -1) - np.roll(x, -1) * y))
+
+
+def brute_force_rectangle_area(points):
+    """Smallest rectangle area over every direction given by a pair of points"""
+    best = math.inf
+    for a, b in itertools.combinations(np.unique(points, axis=0), 2):
+        u = (b - a) / np.hypot(*(b - a))
+        v = np.array([-u[1], u[0]])
+        pu, pv = points @ u, points @ v
+        best = min(best, (pu.max() - pu.min()) * (pv.max() - pv.min()))
+    return best
+
+
+def brute_force_circle_radius(points):
+    """Smallest circle through two or three of the points holding them all"""
+    points = [tuple(p) for p in np.unique(points, axis=0)]
+    if len(points) == 1:
+        return 0.0
+    best = math.inf
+    candidates = [engine._circle_two(a, b) for a, b in itertools.combinations(points, 2)]
+    for a, b, c in itertools.combinations(points, 3):
+        try:
+            candidates.append(engine._circle_three(a, b, c))
+        except ZeroDivisionError:
+            continue
+    for cx, cy, r in candidates:
+        if all(math.hypot(x - cx, y - cy) <= r * (1 + 1e-9) + 1e-12 for x, y in points):
+            best = min(best, r)
+    return best
+
+
+# ---------------------------------------------------------------------------
+# WKB parsing
+# ---------------------------------------------------------------------------
+
+def wkb(order, wkb_type, body):
+    return struct.pack(order + 'BI', 1 if order == '<' else 0, wkb_type) + body
+
+
+def ring_body(order, points):
+    return struct.pack(order + 'I', len(points)) + b''.join(
+        struct.pack(order + 'd' * len(p), *p) for p in points
+    )
+
+
+def test_wkb_point_z_and_m():
+    point_z = wkb('<', 1001, struct.pack('<ddd', 1, 2, 3))
+    point_zm_ewkb = struct.pack('<BII', 1, 0x80000001 | 0x40000000 | 0x20000000, 4326) \
+        + struct.pack('<dddd', 5, 6, 7, 8)
+    assert engine.wkb_coordinates(point_z).tolist() == [[1, 2]]
+    assert engine.wkb_coordinates(point_zm_ewkb).tolist() == [[5, 6]]
+
+
+def test_wkb_empty_point_is_skipped():
+    empty = wkb('<', 1, struct.pack('<dd', math.nan, math.nan))
+    assert engine.wkb_coordinates(empty).shape == (0, 2)
+
+
+def test_wkb_linestring_m_big_endian():
+    line = wkb('>', 2002, ring_body('>', [(0, 1, 9), (2, 3, 9)]))
+    assert engine.wkb_coordinates(line).tolist() == [[0, 1], [2, 3]]
+
+
+def test_wkb_multipolygon_zm_and_collection():
+    square = [(0, 0, 1, 2), (1, 0, 1, 2), (1, 1, 1, 2), (0, 0, 1, 2)]
+    hole = [(0.2, 0.2, 1, 2), (0.4, 0.2, 1, 2), (0.2, 0.4, 1, 2), (0.2, 0.2, 1, 2)]
+    polygon = wkb('<', 3003, struct.pack('<I', 2) + ring_body('<', square) + ring_body('<', hole))
+    multi = wkb('<', 3006, struct.pack('<I', 2) + polygon + polygon)
+    point = wkb('>', 1, struct.pack('>dd', 7, 8))
+    collection = wkb('<', 7, struct.pack('<I', 2) + multi + point)
+
+    coords = engine.wkb_coordinates(collection)
+    expected = [p[:2] for p in square + hole] * 2 + [(7, 8)]
+    assert coords.tolist() == [list(p) for p in expected]
+
+
+def test_wkb_curves_are_rejected():
+    circular_string = wkb('<', 8, ring_body('<', [(0, 0), (1, 1), (2, 0)]))
+    with pytest.raises(ValueError):
+        engine.wkb_coordinates(circular_string)
+
+
+def test_pack_wkb_keeps_empty_features():
+    polygon = engine.polygon_wkb(np.array([[0, 0], [1, 0], [1, 1], [0, 0]], dtype=float))
+    coords, offsets = engine.pack_wkb([None, polygon, b''])
+    assert offsets.tolist() == [0, 0, 4, 4]
+    assert len(coords) == 4
+
+
+# ---------------------------------------------------------------------------
+# Envelopes
+# ---------------------------------------------------------------------------
+
+def test_envelopes_match_numpy_and_give_nan_for_empty_features():
+    rng = np.random.default_rng(1)
+    arrays = random_features(rng)
+    coords, offsets = engine.pack_coordinates(arrays)
+    bounds = engine.envelopes(coords, offsets)
+    for points, row in zip(arrays, bounds):
+        if len(points):
+            assert row.tolist() == [*points.min(axis=0), *points.max(axis=0)]
+        else:
+            assert np.isnan(row).all()
+
+
+def test_envelope_rings_skip_empty_features():
+    coords, offsets = engine.pack_coordinates([np.empty((0, 2)), np.array([[1.0, 2.0], [3.0, 5.0]])])
+    rings = engine.bounding_rings(coords, offsets, engine.ENVELOPE)
+    assert rings[0] is None
+    assert abs(ring_area(rings[1])) == pytest.approx(6.0)
+
+
+# ---------------------------------------------------------------------------
+# Convex hulls and the octagon filter
+# ---------------------------------------------------------------------------
+
+def check_hull(points, hull):
+    unique = np.unique(points, axis=0)
+    if len(unique) <= 2:
+        assert len(hull) == len(unique)
+        return
+    # Every hull vertex is an input vertex
+    assert all((unique == vertex).all(axis=1).any() for vertex in hull)
+    # Convex and counter-clockwise, with every input vertex inside
+    tolerance = tolerance_of(points) * max(1.0, float(np.ptp(points)))
+    for i in range(len(hull)):
+        a, b = hull[i], hull[(i + 1) % len(hull)]
+        cross = (b[0] - a[0]) * (unique[:, 1] - a[1]) - (b[1] - a[1]) * (unique[:, 0] - a[0])
+        assert cross.min() >= -tolerance
+        following = hull[(i + 2) % len(hull)]
+        turn = (b[0] - a[0]) * (following[1] - a[1]) - (b[1] - a[1]) * (following[0] - a[0])
+        assert turn >= -tolerance
+
+
+def test_convex_hulls_against_brute_force():
+    rng = np.random.default_rng(2)
+    arrays = random_features(rng)
+    hulls = split(*engine.convex_hulls(*engine.pack_coordinates(arrays)))
+    for points, hull in zip(arrays, hulls):
+        check_hull(points, hull)
+
+
+def test_convex_hulls_past_the_array_passes():
+    # Only one vertex of the arc drops per pass, the rest is finished by
+    # the plain monotone chain
+    t = np.linspace(0, 1, engine.CHAIN_PASSES * 4)
+    arc = np.column_stack([t, t ** 2])
+    points = np.vstack([arc, [[1.5, -3.0]]])
+    rng = np.random.default_rng(9)
+    arrays = [points, rng.random((50, 2)), points[::-1]]
+    hulls = split(*engine.convex_hulls(*engine.pack_coordinates(arrays)))
+    for points, hull in zip(arrays, hulls):
+        check_hull(points, hull)
+
+
+def test_convex_hulls_with_equal_x():
+    points = np.array([[0, 3], [0, 0], [0, 1], [2, 2], [2, 0], [2, 5], [1, 1]], dtype=float)
+    hull = split(*engine.convex_hulls(*engine.pack_coordinates([points, points[::-1]])))
+    assert hull[0].tolist() == [[0, 0], [2, 0], [2, 5], [0, 3]]
+    assert hull[1].tolist() == hull[0].tolist()
+
+
+def test_octagon_filter_keeps_the_hull():
+    rng = np.random.default_rng(3)
+    arrays = random_features(rng, max_vertices=300)
+    coords, offsets = engine.pack_coordinates(arrays)
+    filtered = engine.octagon_filter(coords, offsets)
+    assert len(filtered[0]) <= len(coords)
+    for before, after in zip(split(*engine.convex_hulls(coords, offsets)),
+                             split(*engine.convex_hulls(*filtered))):
+        assert np.array_equal(before, after)
+
+
+def test_approximate_filter_stays_within_tolerance():
+    rng = np.random.default_rng(4)
+    points = rng.random((5000, 2)) * 100
+    coords, offsets = engine.pack_coordinates([points])
+    reduced, _ = engine.reduce_vertices(coords, offsets, tolerance=0.5)
+    assert len(reduced) < len(points)
+    distance = np.hypot(*(np.round(points / (0.5 * np.sqrt(2))) * 0.5 * np.sqrt(2) - points).T)
+    assert distance.max() <= 0.5 + 1e-12
+
+
+def test_approximate_filter_drops_repeats():
+    rng = np.random.default_rng(5)
+    points = np.repeat(rng.random((50, 2)) * 100, 3, axis=0)
+    coords, offsets = engine.pack_coordinates([points])
+    reduced, _ = engine.reduce_vertices(coords, offsets, tolerance=1e-9)
+    assert len(np.unique(reduced, axis=0)) == len(reduced)
+
+
+def test_exact_filter_skips_convex_outlines():
+    angles = np.linspace(0, 2 * np.pi, 40, endpoint=False)
+    ring = np.column_stack([np.cos(angles), np.sin(angles)])
+    coords, offsets = engine.pack_coordinates(
+        [ring + i for i in range(engine.OCTAGON_SAMPLE_STRIDE)]
+    )
+    reduced, reduced_offsets = engine.reduce_vertices(coords, offsets)
+    assert np.array_equal(reduced, coords)
+    assert np.array_equal(reduced_offsets, offsets)
+
+
+# ---------------------------------------------------------------------------
+# Oriented rectangles
+# ---------------------------------------------------------------------------
+
+def check_rectangles(arrays):
+    coords, offsets = engine.pack_coordinates(arrays)
+    hull_coords, hull_offsets = engine.convex_hulls(coords, offsets)
+    u, bounds = engine.oriented_rectangles(hull_coords, hull_offsets)
+    for points, direction, row in zip(arrays, u, bounds):
+        if len(np.unique(points, axis=0)) < 2:
+            assert np.isnan(row).all()
+            continue
+        v = np.array([-direction[1], direction[0]])
+        tolerance = tolerance_of(points)
+        pu, pv = points @ direction, points @ v
+        # Holds every vertex, and is as small as the best brute force direction
+        assert pu.min() >= row[0] - tolerance and pu.max() <= row[2] + tolerance
+        assert pv.min() >= row[1] - tolerance and pv.max() <= row[3] + tolerance
+        area = (row[2] - row[0]) * (row[3] - row[1])
+        assert area >= 0
+        assert area == pytest.approx(
+            brute_force_rectangle_area(points), rel=1e-9, abs=tolerance * np.ptp(points)
+        )
+
+
+def test_oriented_rectangles_against_brute_force():
+    check_rectangles(random_features(np.random.default_rng(5), max_vertices=20))
+
+
+def test_oriented_rectangle_of_a_large_hull():
+    rng = np.random.default_rng(6)
+    angles = np.sort(rng.random(3000) * 2 * np.pi)
+    points = np.column_stack([3 * np.cos(angles), np.sin(angles)])
+    coords, offsets = engine.pack_coordinates([points])
+    hull_coords, hull_offsets = engine.convex_hulls(coords, offsets)
+    assert len(hull_coords) > 1000
+    u, bounds = engine.oriented_rectangles(hull_coords, hull_offsets)
+
+    # Brute force over the hull edges, in blocks to bound memory
+    hull = hull_coords
+    edges = np.roll(hull, -1, axis=0) - hull
+    edges /= np.hypot(edges[:, 0], edges[:, 1])[:, None]
+    best = math.inf
+    for block in np.array_split(edges, 30):
+        pu = block @ hull.T
+        pv = np.column_stack([-block[:, 1], block[:, 0]]) @ hull.T
+        areas = np.ptp(pu, axis=1) * np.ptp(pv, axis=1)
+        best = min(best, areas.min())
+    row = bounds[0]
+    assert (row[2] - row[0]) * (row[3] - row[1]) == pytest.approx(best, rel=1e-12)
+
+
+def test_oriented_rectangle_of_collinear_points_is_flat():
+    points = np.array([[0.0, 1.0], [0.25, 1.5], [1.0, 3.0]])
+    coords, offsets = engine.pack_coordinates([points])
+    u, bounds = engine.oriented_rectangles(*engine.convex_hulls(coords, offsets))
+    assert bounds[0][3] - bounds[0][1] == pytest.approx(0.0, abs=1e-12)
+    assert bounds[0][2] - bounds[0][0] == pytest.approx(math.hypot(1, 2))
+
+
+# ---------------------------------------------------------------------------
+# Enclosing circles
+# ---------------------------------------------------------------------------
+
+def test_welzl_against_brute_force():
+    rng = np.random.default_rng(7)
+    for size in range(1, 13):
+        for _ in range(5):
+            points = np.round(rng.random((size, 2)) * 20, 1)
+            cx, cy, r = engine.welzl(points.tolist())
+            assert np.hypot(points[:, 0] - cx, points[:, 1] - cy).max() <= r * (1 + 1e-9) + 1e-12
+            assert r == pytest.approx(brute_force_circle_radius(points), rel=1e-9, abs=1e-12)
+
+
+def test_enclosing_circles_of_packed_hulls():
+    rng = np.random.default_rng(8)
+    arrays = random_features(rng, max_vertices=10)
+    coords, offsets = engine.pack_coordinates(arrays)
+    circles = engine.enclosing_circles(*engine.convex_hulls(coords, offsets))
+    for points, (cx, cy, r) in zip(arrays, circles):
+        if not len(points):
+            assert np.isnan(r)
+            continue
+        assert r == pytest.approx(brute_force_circle_radius(points), rel=1e-9, abs=tolerance_of(points))
+
+
+def test_enclosing_circles_small_and_large_hulls():
+    rng = np.random.default_rng(10)
+    arrays = []
+    for size in (1, 2, 3, 5, 17, 40, engine.LOCKSTEP_VERTICES, 150):
+        angles = rng.random(size) * 2 * np.pi
+        arrays.append(np.column_stack([np.cos(angles), np.sin(angles)]) * rng.random(size)[:, None])
+        arrays.append(np.column_stack([np.cos(angles), np.sin(angles)]) * 5 + 10)
+    circles = engine.enclosing_circles(*engine.convex_hulls(*engine.pack_coordinates(arrays)))
+    for points, (cx, cy, r) in zip(arrays, circles):
+        assert np.hypot(points[:, 0] - cx, points[:, 1] - cy).max() <= r * (1 + 1e-9) + 1e-12
+        if len(points) <= 40:
+            assert r == pytest.approx(brute_force_circle_radius(points), rel=1e-9, abs=1e-12)
+        else:
+            assert r == pytest.approx(engine.welzl(points.tolist())[2], rel=1e-9)
+
+
+# ---------------------------------------------------------------------------
+# Rings and measurements
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize('geometry_type', [
+    engine.ENVELOPE, engine.ORIENTED_RECTANGLE, engine.CIRCLE, engine.CONVEX_HULL
+])
+def test_bounding_rings_hold_their_features(geometry_type):
+    rng = np.random.default_rng(9)
+    arrays = [rng.random((int(rng.integers(3, 50)), 2)) * 10 for _ in range(30)]
+    coords, offsets = engine.pack_coordinates(arrays)
+    rings = engine.bounding_rings(coords, offsets, geometry_type, segments=720)
+    for points, ring in zip(arrays, rings):
+        assert np.array_equal(ring[0], ring[-1])
+        hull = engine.convex_hulls(*engine.pack_coordinates([points]))[0]
+        # The ring area is at least the hull area, and the ring is convex
+        assert abs(ring_area(ring)) >= abs(ring_area(np.vstack([hull, hull[:1]]))) * (1 - 1e-9)
+
+
+def test_measurements_of_an_axis_aligned_rectangle():
+    points = np.array([[0.0, 0.0], [4.0, 0.0], [4.0, 1.0], [0.0, 1.0], [2.0, 0.5]])
+    coords, offsets = engine.pack_coordinates([points])
+    _, measurements = engine.bounding_rings(
+        coords, offsets, engine.ORIENTED_RECTANGLE, measure=True
+    )
+    width, height, angle, area, perimeter, fill_ratio = measurements[0]
+    assert (width, height, area, perimeter) == pytest.approx((4, 1, 4, 10))
+    assert angle == pytest.approx(90.0)
+    assert fill_ratio == pytest.approx(1.0)
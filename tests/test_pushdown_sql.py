@@ -0,0 +1,154 @@
+"""
+Runs the generated push-down queries on an in-memory SQLite database.
+
+The spatial functions each dialect calls are registered from the NumPy
+engine, so grouping, filtering, quoting and the first feature key are
+checked against a plain Python aggregation.
+"""
+import sqlite3
+
+import numpy as np
+import pytest
+
+from MinimumBoundingBox import geometry_engine as engine
+from MinimumBoundingBox.pushdown_sql import (
+    CONVEX_HULL, DIALECTS, ENVELOPE, grouped_query, quote_identifier
+)
+
+BOUND_FUNCTIONS = {
+    'postgres': ('ST_XMin', 'ST_YMin', 'ST_XMax', 'ST_YMax'),
+    'spatialite': ('MbrMinX', 'MbrMinY', 'MbrMaxX', 'MbrMaxY'),
+    'gpkg': ('ST_MinX', 'ST_MinY', 'ST_MaxX', 'ST_MaxY'),
+}
+
+
+class Collect:
+    """Aggregate of the vertices of WKB geometries, as a LineString"""
+
+    def __init__(self):
+        self.parts = []
+
+    def step(self, wkb):
+        if wkb is not None:
+            self.parts.append(engine.wkb_coordinates(wkb))
+
+    def finalize(self):
+        if not self.parts:
+            return None
+        return engine.linestring_wkb(np.concatenate(self.parts))
+
+
+def convex_hull(wkb):
+    coords, offsets = engine.pack_wkb([wkb])
+    hull, _ = engine.convex_hulls(coords, offsets)
+    return engine.polygon_wkb(np.vstack([hull, hull[:1]]))
+
+
+def bound(column, reduce):
+    def function(wkb):
+        coords = engine.wkb_coordinates(wkb)
+        return float(reduce(coords[:, column])) if len(coords) else None
+    return function
+
+
+def connect(dialect):
+    connection = sqlite3.connect(':memory:')
+    for name, column, reduce in zip(
+        BOUND_FUNCTIONS[dialect], (0, 1, 0, 1), (np.min, np.min, np.max, np.max)
+    ):
+        connection.create_function(name, 1, bound(column, reduce))
+    connection.create_aggregate('Collect', 1, Collect)
+    connection.create_function('ConvexHull', 1, convex_hull)
+    connection.create_function('AsBinary', 1, lambda wkb: wkb)
+    return connection
+
+
+@pytest.fixture
+def features():
+    rng = np.random.default_rng(0)
+    rows = []
+    for fid in range(1, 201):
+        points = rng.random((int(rng.integers(3, 12)), 2)) * 50 + fid
+        rows.append({
+            'fid': fid,
+            'group': ["it's", 'b', None, 'd'][fid % 4],
+            'size': fid % 7,
+            'geom': None if fid % 23 == 0 else engine.polygon_wkb(np.vstack([points, points[:1]])),
+        })
+    return rows
+
+
+def load(connection, rows, table='my "table"', geometry='geom col', group='group "field"'):
+    connection.execute('CREATE TABLE {} (fid INTEGER PRIMARY KEY, {} TEXT, size INTEGER, {} BLOB)'.format(
+        quote_identifier(table), quote_identifier(group), quote_identifier(geometry)
+    ))
+    connection.executemany(
+        'INSERT INTO {} VALUES (?, ?, ?, ?)'.format(quote_identifier(table)),
+        [(row['fid'], row['group'], row['size'], row['geom']) for row in rows]
+    )
+
+
+def expected_groups(rows, keep=lambda row: True):
+    groups = {}
+    for row in rows:
+        if row['geom'] is None or not keep(row):
+            continue
+        group = groups.setdefault(row['group'], {'fid': row['fid'], 'coords': []})
+        group['fid'] = min(group['fid'], row['fid'])
+        group['coords'].append(engine.wkb_coordinates(row['geom']))
+    return {key: (value['fid'], np.concatenate(value['coords'])) for key, value in groups.items()}
+
+
+@pytest.mark.parametrize('dialect', sorted(DIALECTS))
+@pytest.mark.parametrize('where', [None, 'size > 2'])
+def test_grouped_envelopes(dialect, where, features):
+    connection = connect(dialect)
+    load(connection, features)
+    sql = grouped_query(
+        dialect, quote_identifier('my "table"'), 'geom col', 'fid', 'group "field"',
+        ENVELOPE, where
+    )
+    rows = connection.execute(sql).fetchall()
+
+    expected = expected_groups(features, lambda row: where is None or row['size'] > 2)
+    assert {row[0] for row in rows} == set(expected)
+    for group, fid, *bounds in rows:
+        first, coords = expected[group]
+        assert fid == first
+        assert bounds == [*coords.min(axis=0), *coords.max(axis=0)]
+
+
+@pytest.mark.parametrize('dialect', ['postgres', 'spatialite'])
+def test_grouped_hulls(dialect, features):
+    connection = connect(dialect)
+    if dialect == 'postgres':
+        connection.create_function('ST_AsBinary', 1, lambda wkb: wkb)
+        connection.create_function('ST_ConvexHull', 1, convex_hull)
+        connection.create_aggregate('ST_Collect', 1, Collect)
+    load(connection, features)
+    sql = grouped_query(
+        dialect, quote_identifier('my "table"'), 'geom col', 'fid', 'group "field"',
+        CONVEX_HULL
+    )
+    rows = connection.execute(sql).fetchall()
+
+    expected = expected_groups(features)
+    assert len(rows) == len(expected)
+    for group, fid, wkb in rows:
+        first, coords = expected[group]
+        assert fid == first
+        hull, _ = engine.convex_hulls(*engine.pack_coordinates([coords]))
+        assert np.array_equal(engine.wkb_coordinates(wkb)[:-1], hull)
+
+
+def test_geopackage_has_no_hull_query():
+    assert grouped_query('gpkg', 't', 'geom', 'rowid', 'g', CONVEX_HULL) is None
+
+
+def test_unsupported_options():
+    assert grouped_query('oracle', 't', 'geom', 'fid', 'g', ENVELOPE) is None
+    assert grouped_query('postgres', 't', 'geom', 'fid', 'g', 1) is None
+
+
+def test_quote_identifier_escapes_quotes():
+    assert quote_identifier('a "b"') == '"a ""b"""'